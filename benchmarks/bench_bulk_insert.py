@@ -0,0 +1,48 @@
+"""
+crud.create_users_bulk / create_user_items_bulk 의 초당 저장 행 수 측정.
+
+    $ python -m benchmarks.bench_bulk_insert --rows 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import peewee
+
+from routers.advanced.endpoint.peewee import crud, models, schemas
+
+
+def chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield list(enumerate(rows[start:start + size], start))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    users = [schemas.UserCreate(email=f"user{i}@example.com", password="secret") for i in range(args.rows)]
+    items = [schemas.ItemCreate(title=f"item {i}", description="bench") for i in range(args.rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = peewee.SqliteDatabase(os.path.join(tmp, "bench.db"), pragmas={"journal_mode": "wal"})
+        with db.bind_ctx([models.User, models.Item]):
+            db.create_tables([models.User, models.Item])
+            start = time.perf_counter()
+            seen = set()
+            for chunk in chunks(users, crud.BULK_CHUNK_SIZE):
+                crud.create_users_bulk(chunk, seen)
+            elapsed = time.perf_counter() - start
+            print(f"users: {args.rows} rows in {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+            start = time.perf_counter()
+            for chunk in chunks(items, crud.BULK_CHUNK_SIZE):
+                crud.create_user_items_bulk(chunk, user_id=1)
+            elapsed = time.perf_counter() - start
+            print(f"items: {args.rows} rows in {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
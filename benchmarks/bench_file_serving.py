@@ -0,0 +1,97 @@
+"""
+같은 파일을 여러번 받을 때 전송되는 byte 수 비교.
+FileResponse는 매번 전체를 보내고, RangeFileResponse는 캐시한 ETag로 다시 검증(If-None-Match → 304)하거나
+끊긴 다운로드를 Range로 이어 받을 수 있습니다. 파일은 --change-every번마다 바뀝니다.
+
+    $ python -m benchmarks.bench_file_serving --megabytes 8 --fetches 50
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import FileResponse
+from fastapi.testclient import TestClient
+
+from routers.advanced.endpoint.file_response import RangeFileResponse
+
+
+def make_app(path: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/plain")
+    async def plain():
+        return FileResponse(path, media_type="application/octet-stream")
+
+    @app.get("/range")
+    async def ranged():
+        return RangeFileResponse(path, media_type="application/octet-stream")
+
+    return app
+
+
+def write_file(path: str, size: int, version: int):
+    with open(path, "wb") as file:
+        file.write(bytes([version % 256]) * size)
+    os.utime(path, (version, version))
+
+
+def repeated_fetches(client: TestClient, path: str, url: str, size: int, fetches: int, change_every: int):
+    """매번 새로 받는 클라이언트와 ETag를 기억해 두는 클라이언트."""
+    transferred = 0
+    etag = None
+    for i in range(fetches):
+        if i % change_every == 0:
+            write_file(path, size, i // change_every + 1)
+        headers = {"If-None-Match": etag} if etag else {}
+        response = client.get(url, headers=headers)
+        transferred += len(response.content)
+        if url == "/range" and response.status_code == 200:
+            etag = response.headers["etag"]
+    return transferred
+
+
+def resumed_downloads(client: TestClient, url: str, size: int, fetches: int):
+    """다운로드가 절반에서 끊겼다고 보고, Range를 쓸 수 있으면 나머지만 받습니다."""
+    transferred = 0
+    for _ in range(fetches):
+        first = client.get(url)
+        transferred += size // 2
+        if first.headers.get("accept-ranges") == "bytes":
+            rest = client.get(url, headers={"Range": f"bytes={size // 2}-", "If-Range": first.headers["etag"]})
+        else:
+            rest = client.get(url)
+        transferred += len(rest.content)
+    return transferred
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=8)
+    parser.add_argument("--fetches", type=int, default=50)
+    parser.add_argument("--change-every", type=int, default=10)
+    args = parser.parse_args()
+
+    size = args.megabytes * 1024 * 1024
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "payload.bin")
+        write_file(path, size, 1)
+        client = TestClient(make_app(path))
+        print(f"file {args.megabytes} MB, {args.fetches} fetches, changed every {args.change_every}")
+        for scenario, run in (
+            ("repeat", lambda url: repeated_fetches(client, path, url, size, args.fetches, args.change_every)),
+            ("resume", lambda url: resumed_downloads(client, url, size, args.fetches)),
+        ):
+            results = {}
+            for url in ("/plain", "/range"):
+                start = time.perf_counter()
+                results[url] = run(url)
+                elapsed = time.perf_counter() - start
+                print(f"{scenario} {url:>6}: {results[url] / 1e6:9.1f} MB transferred in {elapsed:6.2f} s")
+            saved = results["/plain"] - results["/range"]
+            print(f"{scenario} saved: {saved / 1e6:9.1f} MB ({saved / results['/plain']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
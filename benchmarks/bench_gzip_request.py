@@ -0,0 +1,75 @@
+"""
+gzip 요청 본문 100MB를 풀 때의 최대 메모리 사용량 비교.
+본문 전체를 읽고 gzip.decompress 하는 방식과 GzipRequest.stream()으로 받는 대로 푸는 방식을
+tracemalloc 최대값으로 비교합니다.
+
+    $ python -m benchmarks.bench_gzip_request --megabytes 100
+"""
+import argparse
+import asyncio
+import gzip
+import time
+import tracemalloc
+
+from starlette.requests import Request
+
+from routers.advanced.endpoint.gzip import GzipRequest
+
+RECEIVE_CHUNK_SIZE = 64 * 1024
+
+
+def make_receive(compressed: bytes):
+    chunks = [compressed[i:i + RECEIVE_CHUNK_SIZE] for i in range(0, len(compressed), RECEIVE_CHUNK_SIZE)]
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    return receive
+
+
+def make_scope():
+    return {"type": "http", "method": "POST", "path": "/", "headers": [(b"content-encoding", b"gzip")]}
+
+
+async def whole_body(compressed: bytes) -> int:
+    request = Request(make_scope(), make_receive(compressed))
+    return len(gzip.decompress(await request.body()))
+
+
+async def streaming(compressed: bytes) -> int:
+    request = GzipRequest(make_scope(), make_receive(compressed))
+    request.max_decompressed_size = float("inf")
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+    return size
+
+
+def measure(func, compressed: bytes):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = asyncio.run(func(compressed))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=100)
+    args = parser.parse_args()
+
+    line = b'{"id": 123456, "name": "fastapi tutorial", "tags": ["gzip", "stream"]}\n'
+    payload = line * (args.megabytes * 1024 * 1024 // len(line))
+    compressed = gzip.compress(payload, compresslevel=6)
+    del payload
+    print(f"payload {args.megabytes} MB, compressed {len(compressed) / 1e6:.1f} MB")
+    for name, func in (("whole body", whole_body), ("streaming", streaming)):
+        size, elapsed, peak = measure(func, compressed)
+        print(f"{name:>11}: {size / 1e6:7.1f} MB in {elapsed:6.2f} s  peak memory {peak / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
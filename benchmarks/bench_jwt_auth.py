@@ -0,0 +1,46 @@
+"""
+get_current_user 한번에 드는 인증 비용을 토큰 캐시 없이/있을 때 비교.
+
+    $ python -m benchmarks.bench_jwt_auth
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from fastapi.security import SecurityScopes
+
+from routers.advanced.endpoint import oauth2
+from routers.tutorial.endpoint import jwt_security
+
+
+def measure(call, repeat: int, before=None) -> float:
+    loop = asyncio.new_event_loop()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if before:
+            before()
+        loop.run_until_complete(call())
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    jwt_token = jwt_security.create_access_token({"sub": "johndoe"}, timedelta(minutes=30))
+    oauth2_token = oauth2.create_access_token({"sub": "johndoe", "scopes": ["me"]}, timedelta(minutes=30))
+    scopes = SecurityScopes(scopes=["me"])
+    cases = {
+        "jwt_security": (lambda: jwt_security.get_current_user(jwt_token), jwt_security.token_cache),
+        "oauth2": (lambda: oauth2.get_current_user(scopes, oauth2_token), oauth2.token_cache),
+    }
+    for name, (call, cache) in cases.items():
+        cold = measure(call, args.repeat, before=cache.clear)
+        warm = measure(call, args.repeat)
+        print(f"{name:>12}: decode every call {cold:7.1f} us  cached {warm:7.1f} us  x{cold / warm:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+oauth2 의존성 체인(get_current_user -> get_current_active_user)의 호출당 비용.
+토큰은 캐시에 들어 있는 상태에서, HTTPException을 매번 미리 만들고 scope를 리스트로 비교하던 방식과
+실패할 때만 예외를 만들고 frozenset으로 비교하는 현재 방식을 성공/실패 경로별로 비교합니다.
+
+    $ python -m benchmarks.bench_oauth2_scopes --repeat 100000
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from fastapi import HTTPException, status
+from fastapi.security import SecurityScopes
+
+from routers.advanced.endpoint import oauth2
+
+
+async def list_scope_check(security_scopes: SecurityScopes, token: str, token_scopes, user):
+    # 이전 구현: 매번 WWW-Authenticate 값과 예외 객체를 만들고 리스트에서 scope를 찾습니다.
+    if security_scopes.scopes:
+        authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
+    else:
+        authenticate_value = "Bearer"
+    HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": authenticate_value},
+    )
+    oauth2.token_cache.is_revoked(token)
+    oauth2.token_cache.get(token)
+    for scope in security_scopes.scopes:
+        if scope not in token_scopes:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not enough permissions",
+                headers={"WWW-Authenticate": authenticate_value},
+            )
+    return await oauth2.get_current_active_user(user)
+
+
+async def current_scope_check(security_scopes: SecurityScopes, token: str):
+    return await oauth2.get_current_active_user(await oauth2.get_current_user(security_scopes, token))
+
+
+def measure(call, repeat: int) -> float:
+    async def loop():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            try:
+                await call()
+            except HTTPException:
+                pass
+        return time.perf_counter() - start
+
+    return asyncio.run(loop()) / repeat * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=100000)
+    args = parser.parse_args()
+
+    token = oauth2.create_access_token({"sub": "johndoe", "scopes": ["me"]}, timedelta(minutes=30))
+    user = asyncio.run(oauth2.user_store.get("johndoe"))
+    token_scopes = ["me"]
+    for name, scopes in (("allowed", ["me"]), ("denied", ["me", "items"])):
+        security_scopes = SecurityScopes(scopes=scopes)
+        before = measure(lambda: list_scope_check(security_scopes, token, token_scopes, user), args.repeat)
+        after = measure(lambda: current_scope_check(security_scopes, token), args.repeat)
+        print(f"{name:>8}: list + eager errors {before:8.0f} ns  set + lazy errors {after:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
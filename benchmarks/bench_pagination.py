@@ -0,0 +1,60 @@
+"""
+OFFSET 페이지네이션과 keyset(cursor) 페이지네이션의 페이지별 응답 시간 비교.
+
+    $ python -m benchmarks.bench_pagination --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import peewee
+
+from routers.advanced.endpoint.peewee import crud, models
+
+
+def populate(db, rows: int):
+    users = [{"email": "owner@example.com", "hashed_password": "x"}]
+    models.User.insert_many(users).execute()
+    batch = []
+    with db.atomic():
+        for i in range(rows):
+            batch.append({"title": f"item {i}", "description": "bench", "owner": 1})
+            if len(batch) == 10000:
+                models.Item.insert_many(batch).execute()
+                batch = []
+        if batch:
+            models.Item.insert_many(batch).execute()
+
+
+def measure(fn, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = peewee.SqliteDatabase(os.path.join(tmp, "bench.db"))
+        with db.bind_ctx([models.User, models.Item]):
+            db.create_tables([models.User, models.Item])
+            populate(db, args.rows)
+            print(f"{'page offset':>12} {'OFFSET ms':>10} {'cursor ms':>10}")
+            for fraction in (0, 0.1, 0.5, 0.9, 0.99):
+                skip = int(args.rows * fraction)
+                after = skip  # Item id는 1부터 순서대로 들어가므로 id == skip 이후가 같은 페이지
+                offset_ms = measure(lambda: crud.get_items(skip=skip, limit=args.limit))
+                cursor_ms = measure(lambda: crud.get_items(limit=args.limit, after=after))
+                print(f"{skip:>12} {offset_ms:>10.3f} {cursor_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
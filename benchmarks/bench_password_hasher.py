@@ -0,0 +1,56 @@
+"""
+로그인이 몰릴 때 bcrypt 검증을 이벤트 루프에서 바로 할 때와 PasswordHasher 풀에서 할 때 비교.
+동시에 N번 검증하는 동안 이벤트 루프가 얼마나 늦게 깨어나는지(loop lag)와 전체 시간을 잽니다.
+
+    $ python -m benchmarks.bench_password_hasher --logins 16
+"""
+import argparse
+import asyncio
+import time
+
+from routers.advanced.endpoint.password_hasher import password_hasher
+
+HASHED = "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW"
+
+
+async def inline_verify():
+    return password_hasher.context.verify("secret", HASHED)
+
+
+async def pooled_verify():
+    return await password_hasher.verify("secret", HASHED)
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.005):
+    worst = 0.0
+    while not stop.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - before - interval)
+    return worst
+
+
+async def run(verify, logins: int):
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(verify() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await lag
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=16)
+    args = parser.parse_args()
+
+    for name, verify in (("event loop", inline_verify), ("hasher pool", pooled_verify)):
+        elapsed, lag = asyncio.run(run(verify, args.logins))
+        print(f"{name:>12}: {args.logins} logins in {elapsed * 1000:7.1f} ms  max loop lag {lag * 1000:7.1f} ms")
+    print(password_hasher.executor.executor_stats())
+
+
+if __name__ == "__main__":
+    main()
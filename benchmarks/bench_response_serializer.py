@@ -0,0 +1,78 @@
+"""
+FastAPI 기본 응답 직렬화(검증 + jsonable_encoder + json.dumps)와
+FastResponseRoute의 미리 만든 serializer(orjson) 비교.
+
+    $ python -m benchmarks.bench_response_serializer --users 100 --items 5
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from routers.advanced.endpoint.fast_response import FastResponseRoute
+from routers.advanced.endpoint.peewee import schemas
+
+
+def make_users(users: int, items: int) -> List[dict]:
+    return [
+        {
+            "id": user_id,
+            "email": f"user{user_id}@example.com",
+            "is_active": True,
+            "items": [
+                {"id": user_id * items + i, "title": f"item {i}", "description": "bench", "owner_id": user_id}
+                for i in range(items)
+            ],
+        }
+        for user_id in range(users)
+    ]
+
+
+def measure(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    router = APIRouter(route_class=FastResponseRoute)
+
+    @router.get("/users/", response_model=List[schemas.User])
+    async def read_users():
+        pass
+
+    route = router.routes[0]
+    payloads = {
+        "dict": make_users(args.users, args.items),
+        "model": [schemas.User(**user) for user in make_users(args.users, args.items)],
+    }
+    loop = asyncio.new_event_loop()
+
+    for name, payload in payloads.items():
+        def default_path():
+            content = loop.run_until_complete(
+                serialize_response(field=route.secure_cloned_response_field, response_content=payload)
+            )
+            return JSONResponse(content).body
+
+        def fast_path():
+            return route.serializer(payload)
+
+        default_us = measure(default_path, args.repeat)
+        fast_us = measure(fast_path, args.repeat)
+        print(f"{name:>6}: default {default_us:9.1f} us  fast {fast_us:9.1f} us  x{default_us / fast_us:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Jinja2 템플릿 렌더링 처리량 비교.
+기본 Jinja2Templates(auto_reload, url_for 매번 계산, 전체 문자열 렌더링)와
+ProductionTemplates(auto_reload 끔, url_for 캐시)의 TemplateResponse, StreamingTemplateResponse를
+작은 페이지(item.html)와 큰 페이지(items.html)로 비교하고, 큰 페이지는 첫 byte까지의 시간과 tracemalloc 최대값도 봅니다.
+마지막으로 bytecode cache가 있을 때와 없을 때 새 환경에서 템플릿을 처음 불러오는 시간을 비교합니다.
+
+    $ python -m benchmarks.bench_template_render --requests 2000 --rows 5000
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+from starlette.requests import Request
+
+from routers.advanced.endpoint import template
+from routers.advanced.endpoint.templating import ProductionTemplates
+
+TEMPLATE_DIR = "./routers/advanced/templates"
+
+app = FastAPI()
+app.include_router(template.router)
+app.mount("/static", StaticFiles(directory="./routers/advanced/static"), name="static")
+
+
+def make_request() -> Request:
+    scope = {
+        "type": "http", "method": "GET", "path": "/", "root_path": "", "query_string": b"",
+        "scheme": "http", "server": ("testserver", 80), "headers": [(b"host", b"testserver")],
+        "router": app.router, "app": app,
+    }
+    return Request(scope)
+
+
+def items(rows: int):
+    return ({"id": str(i), "name": f"item {i}", "price": i * 1.5} for i in range(rows))
+
+
+async def drive(response, request: Request):
+    first_byte = None
+    size = 0
+
+    async def receive():
+        # StreamingResponse는 disconnect를 기다리므로 연결이 끊기지 않은 것처럼 대기합니다.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal first_byte, size
+        if message["type"] == "http.response.body":
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            size += len(message.get("body", b""))
+
+    await response(request.scope, receive, send)
+    return first_byte, size
+
+
+async def run(make_response, requests: int):
+    started = time.perf_counter()
+    first_bytes = []
+    size = 0
+    for _ in range(requests):
+        request = make_request()
+        start = time.perf_counter()
+        first_byte, size = await drive(make_response(request), request)
+        first_bytes.append(first_byte - start)
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, sorted(first_bytes)[len(first_bytes) // 2], size
+
+
+def measure_peak(make_response):
+    tracemalloc.start()
+    request = make_request()
+    asyncio.run(drive(make_response(request), request))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def cold_load(cache_dir):
+    start = time.perf_counter()
+    if cache_dir is None:
+        Jinja2Templates(directory=TEMPLATE_DIR).get_template("items.html")
+    else:
+        ProductionTemplates(directory=TEMPLATE_DIR, cache_dir=cache_dir).get_template("items.html")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    default = Jinja2Templates(directory=TEMPLATE_DIR)
+    production = ProductionTemplates(directory=TEMPLATE_DIR)
+    production.precompile()
+    large_requests = max(args.requests // 100, 5)
+
+    cases = (
+        ("item.html", "default", args.requests,
+         lambda request: default.TemplateResponse("item.html", {"request": request, "id": "foo"})),
+        ("item.html", "production", args.requests,
+         lambda request: production.TemplateResponse("item.html", {"request": request, "id": "foo"})),
+        ("items.html", "default", large_requests,
+         lambda request: default.TemplateResponse("items.html", {"request": request, "items": items(args.rows)})),
+        ("items.html", "production", large_requests,
+         lambda request: production.TemplateResponse("items.html", {"request": request, "items": items(args.rows)})),
+        ("items.html", "streaming", large_requests,
+         lambda request: production.StreamingTemplateResponse(
+             "items.html", {"request": request, "items": items(args.rows)})),
+    )
+    print(f"{args.requests} small pages, {large_requests} pages of {args.rows} rows")
+    for name, mode, requests, make_response in cases:
+        throughput, first_byte, size = asyncio.run(run(make_response, requests))
+        line = (f"{name:>10} {mode:>10}: {throughput:9.1f} pages/s  {size / 1e3:8.1f} KB  "
+                f"first byte {first_byte * 1e3:7.2f} ms")
+        if name == "items.html":
+            line += f"  peak memory {measure_peak(make_response) / 1e6:6.1f} MB"
+        print(line)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        ProductionTemplates(directory=TEMPLATE_DIR, cache_dir=cache_dir).precompile()
+        print(f"cold load without bytecode cache: {cold_load(None) * 1e3:6.2f} ms")
+        print(f"cold load with bytecode cache:    {cold_load(cache_dir) * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
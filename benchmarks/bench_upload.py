@@ -0,0 +1,100 @@
+"""
+multipart 업로드 처리 방식별 처리량과 최대 RSS 비교.
+본문은 64KB chunk로 만들어 ASGI receive로 흘려 보내므로 벤치마크 자체는 본문 전체를 메모리에 두지 않습니다.
+방식마다 별도 프로세스에서 실행해 ru_maxrss를 따로 잽니다.
+
+    $ python -m benchmarks.bench_upload --megabytes 1024
+"""
+import argparse
+import asyncio
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from fastapi import FastAPI, File, Request, UploadFile
+
+from routers.advanced.endpoint.upload import stream_multipart
+
+CHUNK_SIZE = 64 * 1024
+BOUNDARY = b"benchboundary"
+MODES = ("bytes", "uploadfile", "stream")
+
+
+def build_app(upload_dir: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/bytes")
+    async def upload_bytes(file: bytes = File()):
+        return {"size": len(file)}
+
+    @app.post("/uploadfile")
+    async def upload_file(file: UploadFile):
+        return {"filename": file.filename}
+
+    @app.post("/stream")
+    async def upload_stream(request: Request):
+        _, files = await stream_multipart(request, upload_dir=upload_dir, max_size=1 << 40)
+        return {"size": files[0].size}
+
+    return app
+
+
+def make_receive(megabytes: int):
+    head = (b"--" + BOUNDARY + b"\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="big.bin"\r\n'
+            b"Content-Type: application/octet-stream\r\n\r\n")
+    tail = b"\r\n--" + BOUNDARY + b"--\r\n"
+    block = bytes(range(256)) * (CHUNK_SIZE // 256)
+    remaining = megabytes * 1024 * 1024 // CHUNK_SIZE
+    state = {"sent_head": False, "remaining": remaining}
+
+    async def receive():
+        if not state["sent_head"]:
+            state["sent_head"] = True
+            return {"type": "http.request", "body": head, "more_body": True}
+        if state["remaining"]:
+            state["remaining"] -= 1
+            return {"type": "http.request", "body": block, "more_body": True}
+        return {"type": "http.request", "body": tail, "more_body": False}
+
+    return receive
+
+
+async def run_mode(mode: str, megabytes: int):
+    with tempfile.TemporaryDirectory() as upload_dir:
+        app = build_app(upload_dir)
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "POST", "path": f"/{mode}", "raw_path": f"/{mode}".encode(),
+            "root_path": "", "scheme": "http", "query_string": b"", "server": ("test", 80), "client": ("test", 1),
+            "headers": [(b"content-type", b"multipart/form-data; boundary=" + BOUNDARY)],
+        }
+        status = {}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        start = time.perf_counter()
+        await app(scope, make_receive(megabytes), send)
+        return status["code"], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=1024)
+    parser.add_argument("--mode", choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        code, elapsed = asyncio.run(run_mode(args.mode, args.megabytes))
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{args.mode:>10}: status {code}  {args.megabytes / elapsed:7.1f} MB/s  max RSS {rss:7.1f} MB")
+        return
+    for mode in MODES:
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_upload", "--mode", mode, "--megabytes", str(args.megabytes)])
+
+
+if __name__ == "__main__":
+    main()
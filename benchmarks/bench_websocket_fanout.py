@@ -0,0 +1,68 @@
+"""
+ConnectionManager.publish 의 fan-out 지연 측정.
+N개의 가짜 websocket이 한 topic을 구독하고, 초당 M개의 메시지를 보낼 때
+publish 시점부터 각 수신자의 send까지 걸린 시간을 잽니다.
+
+    $ python -m benchmarks.bench_websocket_fanout --clients 5000 --rate 50 --seconds 2
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from routers.advanced.endpoint.websocket import ConnectionManager
+
+
+class BenchWebSocket:
+    def __init__(self, latencies):
+        self.latencies = latencies
+
+    async def accept(self):
+        pass
+
+    async def send(self, message):
+        await asyncio.sleep(0)  # 실제 전송처럼 이벤트 루프에 제어를 넘깁니다.
+        self.latencies.append(time.perf_counter() - float(message["text"]))
+
+
+async def run(clients: int, rate: int, seconds: float):
+    manager = ConnectionManager()
+    latencies = []
+    sockets = [BenchWebSocket(latencies) for _ in range(clients)]
+    for websocket in sockets:
+        await manager.connect(websocket)
+        manager.subscribe(websocket, "bench")
+
+    interval = 1 / rate
+    messages = int(rate * seconds)
+    publish_times = []
+    for _ in range(messages):
+        start = time.perf_counter()
+        await manager.publish("bench", repr(start))
+        publish_times.append(time.perf_counter() - start)
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+    while len(latencies) < clients * messages:
+        await asyncio.sleep(0.01)
+    for websocket in sockets:
+        manager.disconnect(websocket)
+
+    latencies.sort()
+    print(f"clients={clients} messages={messages} deliveries={len(latencies)}")
+    print(f"publish call  avg {statistics.mean(publish_times) * 1000:8.3f} ms")
+    for label, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"fan-out {label}   {latencies[int(q * (len(latencies) - 1))] * 1000:8.3f} ms")
+    print(f"fan-out max   {latencies[-1] * 1000:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--rate", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=2)
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.rate, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
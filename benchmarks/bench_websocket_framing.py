@@ -0,0 +1,71 @@
+"""
+WebSocket 전송 방식별 frame 수, payload 크기, 처리량 비교.
+permessage-deflate는 ASGI 서버가 처리하므로, frame마다 raw deflate로 압축한 크기를
+"deflate" 열에 함께 적어 실제 전송량을 추정합니다.
+
+    $ python -m benchmarks.bench_websocket_framing --clients 200 --messages 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+import zlib
+
+from routers.advanced.endpoint.websocket import ConnectionManager, Framing
+
+
+class CountingWebSocket:
+    def __init__(self):
+        self.deflated = 0
+
+    async def accept(self):
+        pass
+
+    async def send(self, message):
+        payload = message.get("bytes") or message["text"].encode()
+        # permessage-deflate(no context takeover)와 같은 raw deflate
+        compressor = zlib.compressobj(wbits=-15)
+        self.deflated += len(compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+        await asyncio.sleep(0)
+
+
+async def run(framing: Framing, coalesce_ms: float, clients: int, messages: int):
+    manager = ConnectionManager(queue_size=messages)
+    sockets = [CountingWebSocket() for _ in range(clients)]
+    for websocket in sockets:
+        await manager.connect(websocket, framing, coalesce_ms / 1000)
+
+    start = time.perf_counter()
+    for i in range(messages):
+        await manager.broadcast(json.dumps({"seq": i, "price": 100 + i % 7, "symbol": "FAPI"}))
+        if i % 50 == 0:
+            await asyncio.sleep(0)
+    connections = list(manager.active_connections.values())
+    while any(not connection.queue.empty() for connection in connections):
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(coalesce_ms / 1000 + 0.01)
+    elapsed = time.perf_counter() - start
+
+    frames = sum(connection.frames_sent for connection in connections)
+    payload = sum(connection.bytes_sent for connection in connections)
+    deflated = sum(websocket.deflated for websocket in sockets)
+    for websocket in sockets:
+        manager.disconnect(websocket)
+    label = f"{framing.value}{f' +{coalesce_ms:g}ms' if coalesce_ms else ''}"
+    print(f"{label:>16} {frames:>9} {payload:>12} {deflated:>12} {clients * messages / elapsed:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'mode':>16} {'frames':>9} {'payload B':>12} {'deflate B':>12} {'msgs/s':>12}")
+    for framing in (Framing.text, Framing.msgpack):
+        for coalesce_ms in (0, 5):
+            asyncio.run(run(framing, coalesce_ms, args.clients, args.messages))
+
+
+if __name__ == "__main__":
+    main()
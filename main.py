@@ -1,13 +1,13 @@
-import time
-
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 
 from routers.tutorial import tutorial_api
 from routers.advanced import advanced_api
 from routers.advanced.subapp.main import app as subapi
+from routers.advanced.endpoint.compression import CompressionMiddleware, PrecompressedStaticFiles
+from routers.advanced.endpoint.metrics import MetricsMiddleware, request_metrics
 
 # app info
 app_info = {
@@ -49,14 +49,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 응답 압축. 정적 파일은 미리 만들어 둔 .br/.gz 파일을 보냅니다.
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+# 요청 시간은 route 템플릿별 히스토그램으로 /metrics에서 확인합니다.
+app.add_middleware(MetricsMiddleware, metrics=request_metrics, process_time_header=True)
+
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics():
+    return request_metrics.render()
 
 # tutorials APIs
 # app.include_router(tutorial_api.router)
@@ -66,7 +68,7 @@ app.include_router(advanced_api.router)
 
 # sub application mount
 app.mount("/subapi", subapi)
-app.mount("/routers/advanced/static", StaticFiles(directory='./routers/advanced/static'), name='static')
+app.mount("/routers/advanced/static", PrecompressedStaticFiles(directory='./routers/advanced/static'), name='static')
 
 # if __name__ == '__main__':
 #     uvicorn.run('main:app', reload=True)
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from routers.advanced.endpoint.file_response import RangeFileResponse
+
 router = APIRouter(
     prefix="/open_api_response"
 )
@@ -35,7 +37,7 @@ async def read_item(item_id: str):
 )
 async def read_item(item_id: str, img: bool = None):
     if img:
-        return FileResponse("image.png", media_type="image/png")
+        return RangeFileResponse("image.png", media_type="image/png")
     else:
         return {"id": "foo", "value": "there goes my hero"}
 
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Callable, List, Union
+
+BACKPLANE_DIR = "/tmp/fastapi-tutorial-ws"
+BATCH_WINDOW = 0.002  # 초
+BATCH_MAX_BYTES = 64 * 1024
+
+logger = logging.getLogger("backplane")
+
+Deliver = Callable[[Union[str, None], str], None]
+
+
+class Backplane:
+    """
+    ConnectionManager가 메시지를 다른 프로세스의 연결까지 전달할 때 쓰는 pub/sub 인터페이스.
+    topic이 None이면 모든 연결에 보내는 broadcast입니다.
+    """
+
+    async def start(self, deliver: Deliver):
+        raise NotImplementedError
+
+    async def publish(self, topic: Union[str, None], message: str):
+        raise NotImplementedError
+
+    async def stop(self):
+        pass
+
+
+class InProcessBackplane(Backplane):
+    def __init__(self):
+        self.deliver: Deliver = None
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def publish(self, topic, message):
+        self.deliver(topic, message)
+
+
+class UnixSocketBackplane(Backplane):
+    """
+    워커 프로세스마다 BACKPLANE_DIR 아래에 unix datagram 소켓을 하나씩 열고,
+    publish된 메시지를 BATCH_WINDOW 동안 모아 다른 워커 소켓으로 한번에 보냅니다.
+    자기 프로세스의 연결에는 기다리지 않고 바로 전달합니다.
+    """
+
+    def __init__(self, directory: str = BACKPLANE_DIR, name: str = None,
+                 batch_window: float = BATCH_WINDOW, batch_max_bytes: int = BATCH_MAX_BYTES):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name or os.getpid()}.sock")
+        self.batch_window = batch_window
+        self.batch_max_bytes = batch_max_bytes
+        self.deliver: Deliver = None
+        self.sent_batches = 0
+        self.dropped_batches = 0
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._flush_handle = None
+        self._transport = None
+        self._sender = None
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(self.path)
+        receiver.setblocking(False)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: _BatchProtocol(self), sock=receiver
+        )
+
+    async def publish(self, topic, message):
+        self.deliver(topic, message)
+        # datagram 크기는 인코딩한 byte로 셉니다. ensure_ascii로 비ASCII 문자는 최대 6배까지 늘어납니다.
+        entry = json.dumps([topic, message]).encode()
+        # _pending_bytes + 1이 보낼 datagram 크기입니다(항목마다 "," 또는 "[" 하나, 끝의 "]" 하나).
+        if self._pending and self._pending_bytes + len(entry) + 2 > self.batch_max_bytes:
+            self.flush()
+        self._pending.append(entry)
+        self._pending_bytes += len(entry) + 1
+        if self._pending_bytes + 1 >= self.batch_max_bytes:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self.flush)
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        # 각 항목을 미리 인코딩해 두었으므로 JSON 배열로 잇기만 합니다.
+        # 항목 하나가 batch_max_bytes보다 크지 않은 한 datagram은 batch_max_bytes를 넘지 않습니다.
+        batch = b"[" + b",".join(self._pending) + b"]"
+        self._pending, self._pending_bytes = [], 0
+        for peer in self.peers():
+            try:
+                self._sender.sendto(batch, peer)
+                self.sent_batches += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # 종료된 워커가 남긴 소켓 파일
+                try:
+                    os.unlink(peer)
+                except FileNotFoundError:
+                    pass
+            except (BlockingIOError, OSError) as exc:
+                self.dropped_batches += 1
+                logger.warning("backplane batch to %s dropped: %s", peer, exc)
+
+    def peers(self) -> List[str]:
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".sock") and os.path.join(self.directory, name) != self.path
+        ]
+
+    def receive(self, data: bytes):
+        for topic, message in json.loads(data):
+            self.deliver(topic, message)
+
+    async def stop(self):
+        self.flush()
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._sender is not None:
+            self._sender.close()
+            self._sender = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class _BatchProtocol(asyncio.DatagramProtocol):
+    def __init__(self, backplane: UnixSocketBackplane):
+        self.backplane = backplane
+
+    def datagram_received(self, data, addr):
+        self.backplane.receive(data)
+
+
+def backplane_from_env() -> Backplane:
+    if os.environ.get("WS_BACKPLANE") == "unix":
+        return UnixSocketBackplane(os.environ.get("WS_BACKPLANE_DIR", BACKPLANE_DIR))
+    return InProcessBackplane()
@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, ContextManager, Union
+
+from fastapi import HTTPException, status
+
+
+class ExecutorStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_time_total = 0.0
+        self.run_time_max = 0.0
+
+    def record(self, queue_wait: float, run_time: float):
+        with self._lock:
+            self.completed += 1
+            self.queue_wait_total += queue_wait
+            self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+            self.run_time_total += run_time
+            self.run_time_max = max(self.run_time_max, run_time)
+
+    def as_dict(self):
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_avg": self.queue_wait_total / completed,
+                "queue_wait_max": self.queue_wait_max,
+                "run_time_avg": self.run_time_total / completed,
+                "run_time_max": self.run_time_max,
+            }
+
+
+class BoundedExecutor:
+    """
+    한도가 있는 전용 스레드 풀.
+    starlette의 기본 threadpool과 분리되어 느린 작업이 다른 sync 경로를 막지 않고,
+    실행 중 + 대기 중 작업이 한도를 넘으면 503과 Retry-After로 바로 거절합니다.
+    job_scope가 있으면 작업마다 그 안에서 실행합니다(연결 checkout/반납 등).
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int, busy_detail: str = "Server is busy",
+                 thread_name_prefix: str = "bounded-executor",
+                 job_scope: Union[Callable[[], ContextManager], None] = None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.busy_detail = busy_detail
+        self.job_scope = job_scope
+        self.stats = ExecutorStats()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+    async def run(self, func: Callable, *args, **kwargs):
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self.stats.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=self.busy_detail,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        with self._lock:
+            self._in_flight += 1
+        self.stats.submitted += 1
+        submitted = time.perf_counter()
+        # 요청의 ContextVar(db_state 등)가 작업 스레드에서도 보이도록 context를 복사해 실행합니다.
+        ctx = contextvars.copy_context()
+
+        def call():
+            started = time.perf_counter()
+            try:
+                return ctx.run(self._call, func, args, kwargs)
+            finally:
+                self.stats.record(started - submitted, time.perf_counter() - started)
+
+        future = self._executor.submit(call)
+        # 기다리던 요청이 취소되어도 스레드는 계속 돌기 때문에, 작업이 실제로 끝났을 때 in_flight를 줄입니다.
+        # 콜백은 작업 스레드에서 불리므로 lock으로 보호합니다.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _call(self, func: Callable, args, kwargs):
+        if self.job_scope is None:
+            return func(*args, **kwargs)
+        with self.job_scope():
+            return func(*args, **kwargs)
+
+    def wrap(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+
+        return wrapper
+
+    def executor_stats(self):
+        stats = self.stats.as_dict()
+        stats.update(
+            in_flight=self._in_flight,
+            queued=max(0, self._in_flight - self.max_workers),
+            max_workers=self.max_workers,
+            max_queue=self.max_queue,
+        )
+        return stats
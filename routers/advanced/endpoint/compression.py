@@ -0,0 +1,299 @@
+import gzip
+import mimetypes
+import os
+import sys
+import zlib
+from typing import Callable, Dict, List, Union
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from routers.advanced.endpoint.file_response import ZEROCOPY_EXTENSION, RangeFileResponse, cache_control_for
+
+try:
+    import brotli
+except ImportError:  # br은 brotli 패키지가 있을 때만 협상합니다.
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstd는 zstandard 패키지가 있을 때만 협상합니다.
+    zstandard = None
+
+MINIMUM_SIZE = 500
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/graphql-response+json",
+    "image/svg+xml",
+)
+PRECOMPRESSED_SUFFIXES = (".css", ".js", ".html", ".json", ".svg", ".txt", ".map", ".xml")
+
+
+class GzipEncoder:
+    def __init__(self):
+        self._encoder = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._encoder.compress(data)
+
+    def flush(self) -> bytes:
+        return self._encoder.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._encoder.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._encoder = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._encoder.process(data)
+
+    def flush(self) -> bytes:
+        return self._encoder.flush()
+
+    def finish(self) -> bytes:
+        return self._encoder.finish()
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._encoder = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._encoder.compress(data)
+
+    def flush(self) -> bytes:
+        return self._encoder.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._encoder.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+# 서버가 선호하는 순서. 클라이언트의 q 값이 같으면 앞의 것을 고릅니다.
+ENCODERS: Dict[str, Callable] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+ENCODERS["gzip"] = GzipEncoder
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def ranked_encodings(accept_encoding: str, available=ENCODERS) -> List[str]:
+    """
+    클라이언트가 받는 인코딩을 q 값이 큰 순서로, q가 같으면 available의 순서(서버 선호)로 돌려줍니다.
+    """
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    ranked = [(-accepted.get(encoding, wildcard), order, encoding) for order, encoding in enumerate(available)]
+    return [encoding for q, _, encoding in sorted(ranked) if q < 0]
+
+
+def negotiate_encoding(accept_encoding: str, available=ENCODERS) -> Union[str, None]:
+    ranked = ranked_encodings(accept_encoding, available)
+    return ranked[0] if ranked else None
+
+
+def is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    # Range를 받는 응답(파일)은 byte가 바뀌면 안 되고 요청마다 다시 압축하게 되므로 그대로 보냅니다.
+    # 이런 파일은 precompress_directory로 미리 압축해 둡니다.
+    return (
+        "content-encoding" not in headers
+        and "content-range" not in headers
+        and headers.get("accept-ranges", "none") == "none"
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+def weaken_etag(headers: MutableHeaders):
+    # 압축한 본문은 원래 표현과 byte 단위로 다르므로 strong ETag를 weak로 바꿉니다.
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    Accept-Encoding에 따라 응답 본문을 zstd/br/gzip으로 압축하는 ASGI 미들웨어.
+    minimum_size보다 작은 단일 본문은 그대로 보내고, StreamingResponse는 chunk마다 압축해 flush하므로
+    본문 전체를 모으지 않습니다. 이미 Content-Encoding이 있는 응답(미리 압축된 정적 파일 등)과
+    Range를 받는 파일 응답은 건드리지 않습니다.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        extensions = scope.get("extensions") or {}
+        if ZEROCOPY_EXTENSION in extensions:
+            # 압축할 수도 있으므로 파일을 본문 메시지로 보내도록 zero-copy 확장을 숨깁니다.
+            scope = dict(scope, extensions={key: value for key, value in extensions.items() if key != ZEROCOPY_EXTENSION})
+        responder = CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Union[Message, None] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            if message["status"] == 304:
+                # 304에는 본문과 Content-Type이 없으므로, Range를 받는 파일 응답이 아니면 압축했을 200과 같은
+                # weak ETag를 보내야 캐시가 같은 표현으로 알아봅니다.
+                headers = MutableHeaders(raw=message["headers"])
+                if "content-encoding" not in headers and headers.get("accept-ranges", "none") == "none":
+                    headers.add_vary_header("Accept-Encoding")
+                    weaken_etag(headers)
+                self.passthrough = True
+                await self._send(message)
+                return
+            # 첫 본문을 보기 전에는 압축 여부를 알 수 없으므로 헤더를 잡아 둡니다.
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start_message["headers"])
+            if not is_compressible(headers) or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self._send(start_message)
+                await self._send(message)
+                return
+            self.encoder = ENCODERS[self.encoding]()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            weaken_etag(headers)
+            if not more_body:
+                body = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send(start_message)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self._send(start_message)
+        elif self.passthrough:
+            await self._send(message)
+            return
+
+        if more_body:
+            data = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            data = self.encoder.compress(body) + self.encoder.finish()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    요청한 파일 옆에 빌드 때 만들어 둔 .br/.gz 파일이 있으면 Accept-Encoding에 맞춰 그 파일을 보냅니다.
+    요청마다 압축하지 않고, 없으면 원래 파일을 그대로 보냅니다(CompressionMiddleware도 압축하지 않습니다).
+    응답은 RangeFileResponse라서 Range, ETag, 조건부 GET을 처리하고, 이름에 해시가 들어간 파일은 오래 캐시하게 합니다.
+    """
+
+    encodings = {"br": ".br", "gzip": ".gz"}
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        media_type, _ = mimetypes.guess_type(str(full_path))
+        headers = {"Vary": "Accept-Encoding", "Cache-Control": cache_control_for(str(full_path))}
+        # brotli가 없으면 .gz만 만들어지므로, 가장 선호하는 인코딩이 아니라 파일이 있는 첫 인코딩을 고릅니다.
+        for encoding in ranked_encodings(request_headers.get("accept-encoding", ""), available=self.encodings):
+            compressed_path = f"{full_path}{self.encodings[encoding]}"
+            try:
+                compressed_stat = os.stat(compressed_path)
+            except OSError:
+                continue
+            if compressed_stat.st_mtime >= stat_result.st_mtime:
+                full_path, stat_result = compressed_path, compressed_stat
+                headers["Content-Encoding"] = encoding
+                break
+        return RangeFileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            method=scope["method"],
+            media_type=media_type or "text/plain",
+            headers=headers,
+        )
+
+
+def precompress_directory(directory: str, minimum_size: int = MINIMUM_SIZE):
+    """
+    정적 파일마다 .gz(와 brotli가 있으면 .br) 파일을 만듭니다. 배포 전에 한번 실행합니다.
+
+        $ python -m routers.advanced.endpoint.compression routers/advanced/static
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(PRECOMPRESSED_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            if os.path.getsize(path) < minimum_size:
+                continue
+            with open(path, "rb") as file:
+                data = file.read()
+            outputs = {".gz": lambda: gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                outputs[".br"] = lambda: brotli.compress(data, quality=11)
+            for suffix, compress in outputs.items():
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                with open(target, "wb") as file:
+                    file.write(compress())
+                written.append(target)
+    return written
+
+
+if __name__ == "__main__":
+    for target in precompress_directory(sys.argv[1] if len(sys.argv) > 1 else "routers/advanced/static"):
+        print(target)
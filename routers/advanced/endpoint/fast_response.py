@@ -0,0 +1,136 @@
+import asyncio
+import functools
+import inspect
+from typing import Any, Callable
+
+import orjson
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute, _prepare_response_content
+from pydantic import BaseModel, ValidationError
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+
+SUB_RESPONSE_PARAM = "fast_response_sub_response"
+
+
+def _orjson_default(obj: Any):
+    return jsonable_encoder(obj)
+
+
+def compile_serializer(route: APIRoute) -> Callable[[Any], bytes]:
+    """
+    response_model 한개에 대해 검증 + dict 변환 + orjson 직렬화 함수를 미리 만들어 둡니다.
+    jsonable_encoder의 재귀 탐색 대신 pydantic의 .dict()를 바로 호출하고,
+    이미 response_model과 같은 타입인 값은 검증을 건너뜁니다.
+    """
+    field: ModelField = route.secure_cloned_response_field
+    include = route.response_model_include
+    exclude = route.response_model_exclude
+    if include is not None and not isinstance(include, (set, dict)):
+        include = set(include)
+    if exclude is not None and not isinstance(exclude, (set, dict)):
+        exclude = set(exclude)
+    options = dict(
+        include=include,
+        exclude=exclude,
+        by_alias=route.response_model_by_alias,
+        exclude_unset=route.response_model_exclude_unset,
+        exclude_defaults=route.response_model_exclude_defaults,
+        exclude_none=route.response_model_exclude_none,
+    )
+    # secure_cloned_response_field는 복제된 모델 클래스를 쓰므로, 검증 생략 여부는 선언된 원래 모델로 판단합니다.
+    model = route.response_field.type_
+    is_model = isinstance(model, type) and issubclass(model, BaseModel) and not model.__config__.json_encoders
+
+    if is_model and field.shape == SHAPE_SINGLETON:
+        def to_content(value):
+            return value.dict(**options)
+
+        def is_validated(value):
+            return type(value) is model
+    elif is_model and field.shape == SHAPE_LIST:
+        def to_content(value):
+            return [item.dict(**options) for item in value]
+
+        def is_validated(value):
+            return isinstance(value, list) and all(type(item) is model for item in value)
+    else:
+        def to_content(value):
+            return jsonable_encoder(value, **options)
+
+        def is_validated(value):
+            return False
+
+    def serialize(response_content: Any) -> bytes:
+        if not is_validated(response_content):
+            response_content = _prepare_response_content(
+                response_content,
+                exclude_unset=options["exclude_unset"],
+                exclude_defaults=options["exclude_defaults"],
+                exclude_none=options["exclude_none"],
+            )
+            response_content, errors = field.validate(response_content, {}, loc=("response",))
+            if errors:
+                raise ValidationError(errors if isinstance(errors, list) else [errors], field.type_)
+        return orjson.dumps(to_content(response_content), default=_orjson_default)
+
+    return serialize
+
+
+class FastResponseRoute(APIRoute):
+    """
+    response_model이 있는 경로의 응답을 미리 만든 serializer와 orjson으로 직렬화하는 route class.
+    router에 route_class로 지정한 경로에만 적용됩니다.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if kwargs.get("response_model") is not None:
+            endpoint = self.wrap_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+        if self.response_field is not None:
+            self.serializer = compile_serializer(self)
+
+    def wrap_endpoint(self, endpoint: Callable) -> Callable:
+        # include_router는 이미 만들어진 route의 endpoint로 route를 다시 만들기 때문에 원래 함수를 꺼내 씁니다.
+        endpoint = getattr(endpoint, "fast_response_endpoint", endpoint)
+        signature = inspect.signature(endpoint)
+        is_coroutine = asyncio.iscoroutinefunction(endpoint)
+        # FastAPI는 Response 타입 매개변수를 하나만 주입하므로, endpoint에 이미 있으면 그 이름을 같이 씁니다.
+        response_param = next(
+            (name for name, param in signature.parameters.items() if param.annotation is Response), None
+        )
+
+        @functools.wraps(endpoint)
+        async def fast_endpoint(*args, **kwargs):
+            if response_param:
+                sub_response: Response = kwargs[response_param]
+            else:
+                sub_response: Response = kwargs.pop(SUB_RESPONSE_PARAM)
+            if is_coroutine:
+                raw_response = await endpoint(*args, **kwargs)
+            else:
+                raw_response = await run_in_threadpool(endpoint, *args, **kwargs)
+            if isinstance(raw_response, Response):
+                return raw_response
+            response = Response(
+                content=self.serializer(raw_response),
+                status_code=self.status_code or sub_response.status_code or 200,
+                media_type="application/json",
+            )
+            if sub_response.status_code:
+                response.status_code = sub_response.status_code
+            response.raw_headers.extend(
+                (key, value) for key, value in sub_response.raw_headers if key != b"content-length"
+            )
+            return response
+
+        fast_endpoint.fast_response_endpoint = endpoint
+        if not response_param:
+            fast_endpoint.__signature__ = signature.replace(
+                parameters=[
+                    *signature.parameters.values(),
+                    inspect.Parameter(SUB_RESPONSE_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+                ]
+            )
+        return fast_endpoint
@@ -0,0 +1,253 @@
+import hashlib
+import os
+import re
+import secrets
+import stat
+import threading
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Tuple, Union
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+ETAG_CACHE_SIZE = 4096
+ETAG_HASH_MAX_SIZE = 8 * 1024 * 1024  # 이보다 큰 파일은 내용 대신 (inode, mtime, size)로 ETag를 만듭니다.
+MAX_RANGES = 16
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+FINGERPRINT_PATTERN = re.compile(r"\.[0-9a-f]{8,}\.[^./]+$")
+# accept-ranges는 표현이 아닌 서버 기능을 알리는 헤더라 304에 넣어도 되고, CompressionMiddleware가 파일 응답을 알아보는 데 씁니다.
+NOT_MODIFIED_HEADERS = (
+    "cache-control", "content-location", "date", "etag", "expires", "vary", "last-modified", "accept-ranges",
+)
+
+
+class ETagCache:
+    """
+    파일 내용으로 만든 strong ETag를 (device, inode, mtime, size)마다 한번만 계산해 둡니다.
+    파일이 바뀌면 mtime이나 size가 달라지므로 새로 계산합니다.
+    """
+
+    def __init__(self, maxsize: int = ETAG_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._etags: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    async def etag(self, path: str, stat_result: os.stat_result) -> str:
+        key = (stat_result.st_dev, stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            etag = self._etags.get(key)
+            if etag is not None:
+                self._etags.move_to_end(key)
+                self.hits += 1
+                return etag
+            self.misses += 1
+        if stat_result.st_size <= ETAG_HASH_MAX_SIZE:
+            etag = f'"{await run_in_threadpool(_file_digest, path)}"'
+        else:
+            etag = '"{:x}-{:x}-{:x}"'.format(*key[1:])
+        with self._lock:
+            self._etags[key] = etag
+            while len(self._etags) > self.maxsize:
+                self._etags.popitem(last=False)
+        return etag
+
+
+def _file_digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()[:32]
+
+
+etag_cache = ETagCache()
+
+
+def parse_range(header: str, size: int) -> Union[List[Tuple[int, int]], None]:
+    """
+    Range 헤더를 (start, end) 목록으로 바꿉니다. end는 마지막 byte를 포함합니다.
+    형식이 잘못됐거나 range가 너무 많으면 None(헤더 무시), 만족할 수 있는 range가 없으면 빈 목록(416)입니다.
+    겹치거나 붙어 있는 range는 하나로 합칩니다.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, separator, last = part.partition("-")
+        if not separator:
+            return None
+        try:
+            if not first:
+                suffix = int(last)
+                if suffix <= 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else start
+                if end < start:
+                    return None
+                end = size - 1 if not last else min(end, size - 1)
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, end))
+    if len(ranges) > MAX_RANGES:
+        return None
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def etag_matches(header: str, etag: str, weak: bool = True) -> bool:
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    if weak:
+        return etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
+    return not etag.startswith("W/") and etag in tags
+
+
+def modified_since(header: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return True
+    # "-0000"처럼 시간대가 없는 날짜는 naive로 나오므로 서버 지역 시간이 아닌 UTC로 봅니다.
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return int(mtime) > since.timestamp()
+
+
+def cache_control_for(path: str) -> str:
+    # 파일 이름에 내용 해시가 들어간 파일은 내용이 바뀌면 이름도 바뀌므로 오래 캐시해도 됩니다.
+    return IMMUTABLE_CACHE_CONTROL if FINGERPRINT_PATTERN.search(os.path.basename(path)) else REVALIDATE_CACHE_CONTROL
+
+
+class RangeFileResponse(FileResponse):
+    """
+    FileResponse에 Range(여러 range 포함), 내용 기반 strong ETag, If-None-Match/If-Modified-Since/If-Range를 더한 응답.
+    서버가 zero-copy 확장을 지원하면 파일 내용은 sendfile로 보내고, 아니면 스레드에서 pread로 읽어 보냅니다.
+    """
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        self.headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+        self.headers.setdefault("accept-ranges", "bytes")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stat_result = self.stat_result
+        if stat_result is None:
+            try:
+                stat_result = await run_in_threadpool(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            self.set_stat_headers(stat_result)
+        etag = self.headers.get("etag")
+        if etag is None:
+            etag = await etag_cache.etag(str(self.path), stat_result)
+            self.headers["etag"] = etag
+
+        request_headers = Headers(scope=scope)
+        size = stat_result.st_size
+        ranges = None
+        if self.status_code == 200:
+            if "if-none-match" in request_headers:
+                not_modified = etag_matches(request_headers["if-none-match"], etag)
+            elif "if-modified-since" in request_headers:
+                not_modified = not modified_since(request_headers["if-modified-since"], stat_result.st_mtime)
+            else:
+                not_modified = False
+            if not_modified:
+                headers = {key: value for key, value in self.headers.items() if key in NOT_MODIFIED_HEADERS}
+                await Response(status_code=304, headers=headers)(scope, receive, send)
+                return
+            if "range" in request_headers and self._if_range(request_headers, etag):
+                ranges = parse_range(request_headers["range"], size)
+                if ranges == []:
+                    response = Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+                    await response(scope, receive, send)
+                    return
+
+        if ranges is None:
+            parts = [(0, size - 1, b"")]
+            self.headers["content-length"] = str(size)
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            parts = [(start, end, b"")]
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+        else:
+            boundary = secrets.token_hex(16)
+            parts = [
+                (start, end, (f"--{boundary}\r\nContent-Type: {self.media_type}\r\n"
+                              f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n").encode())
+                for start, end in ranges
+            ]
+            closing = f"\r\n--{boundary}--\r\n".encode()
+            self.status_code = 206
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            self.headers["content-length"] = str(
+                sum(len(head) + end - start + 1 for start, end, head in parts)
+                + len(b"\r\n") * (len(parts) - 1) + len(closing)
+            )
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only or scope.get("method") == "HEAD" or size == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+            file = await run_in_threadpool(open, self.path, "rb")
+            try:
+                for index, (start, end, head) in enumerate(parts):
+                    if head:
+                        prefix = head if index == 0 else b"\r\n" + head
+                        await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                    last = index == len(parts) - 1 and not head
+                    await self._send_range(send, file, start, end - start + 1, zerocopy, more_body=not last)
+                if len(parts) > 1:
+                    await send({"type": "http.response.body", "body": closing, "more_body": False})
+            finally:
+                await run_in_threadpool(file.close)
+        if self.background is not None:
+            await self.background()
+
+    def _if_range(self, request_headers: Headers, etag: str) -> bool:
+        # If-Range가 현재 표현과 맞지 않으면 Range를 무시하고 전체를 보냅니다.
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        if if_range.startswith(('"', "W/")):
+            return etag_matches(if_range, etag, weak=False)
+        return if_range == self.headers.get("last-modified")
+
+    async def _send_range(self, send: Send, file, offset: int, count: int, zerocopy: bool, more_body: bool):
+        if zerocopy:
+            await send({"type": ZEROCOPY_EXTENSION, "file": file, "offset": offset, "count": count, "more_body": more_body})
+            return
+        fd = file.fileno()
+        while count:
+            chunk = await run_in_threadpool(os.pread, fd, min(self.chunk_size, count), offset)
+            if not chunk:
+                raise RuntimeError(f"File at path {self.path} changed while sending.")
+            offset += len(chunk)
+            count -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body or count > 0})
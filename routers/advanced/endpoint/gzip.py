@@ -1,18 +1,151 @@
-import gzip
-from typing import Callable, List
+import zlib
+from typing import AsyncGenerator, Callable, List
 
-from fastapi import Body, APIRouter, Request, Response
+from fastapi import Body, APIRouter, HTTPException, Request, Response, status
 from fastapi.routing import APIRoute
 
+try:
+    import brotli
+except ImportError:  # br 요청은 brotli 패키지가 있을 때만 풀 수 있습니다.
+    brotli = None
+
+MAX_DECOMPRESSED_SIZE = 10 * 1024 * 1024
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+BROTLI_INPUT_SLICE = 1024
+
+
+class ZlibDecoder:
+    def __init__(self, wbits: int):
+        self.wbits = wbits
+        self._decoder = zlib.decompressobj(wbits)
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        while True:
+            decoder = self._decoder
+            if decoder.eof:
+                data = decoder.unused_data + data
+                # gzip은 member 여러 개를 이어 붙일 수 있으므로 남은 입력으로 다음 member를 풉니다.
+                if not data or self.wbits <= zlib.MAX_WBITS:
+                    return b""
+                decoder = self._decoder = zlib.decompressobj(self.wbits)
+            # max_length만큼만 풀고 남은 입력은 unconsumed_tail에 남겨 두므로 한번에 커지는 출력이 없습니다.
+            output = decoder.decompress(decoder.unconsumed_tail + data, max_length)
+            if output or not decoder.eof:
+                return output
+            data = b""
+
+    def flush(self) -> bytes:
+        if not self._decoder.eof:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Truncated compressed body")
+        return self._decoder.flush()
+
+
+class BrotliDecoder:
+    def __init__(self):
+        self._decoder = brotli.Decompressor()
+        self._tail = b""
+        self._offset = 0
+        # brotli 1.1부터는 process가 출력 크기를 제한하고 남은 입력을 안에 들고 있습니다.
+        self._limited = hasattr(self._decoder, "can_accept_more_data")
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        if data:
+            self._tail, self._offset = self._tail[self._offset:] + data, 0
+        if self._limited:
+            if self._tail and self._decoder.can_accept_more_data():
+                data, self._tail = self._tail, b""
+            else:
+                data = b""
+            return self._decoder.process(data, output_buffer_limit=max_length)
+        # 출력 크기를 제한할 수 없는 버전은 입력을 조금씩 넣어 한번에 커지는 출력을 줄이고,
+        # 호출한 쪽이 조각마다 풀린 크기를 확인하게 합니다.
+        while self._offset < len(self._tail):
+            data = self._tail[self._offset:self._offset + BROTLI_INPUT_SLICE]
+            self._offset += BROTLI_INPUT_SLICE
+            output = self._decoder.process(data)
+            if output:
+                return output
+        return b""
+
+    def flush(self) -> bytes:
+        if not self._decoder.is_finished():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Truncated compressed body")
+        return b""
+
+
+DECODERS = {
+    "gzip": lambda: ZlibDecoder(16 + zlib.MAX_WBITS),
+    "x-gzip": lambda: ZlibDecoder(16 + zlib.MAX_WBITS),
+    "deflate": lambda: ZlibDecoder(zlib.MAX_WBITS),
+}
+if brotli is not None:
+    DECODERS["br"] = BrotliDecoder
+
 
 class GzipRequest(Request):
-    async def body(self) -> bytes:
-        if not hasattr(self, "_body"):
-            body = await super().body()
-            if "gzip" in self.headers.getlist("Content-Encoding"):
-                body = gzip.decompress(body)
-            self._body = body
-        return self._body
+    """
+    Content-Encoding(gzip, deflate, br)으로 압축된 요청 본문을 받는 대로 풀어서 stream으로 넘겨줍니다.
+    압축된 본문 전체를 먼저 읽지 않고, 풀린 크기가 max_decompressed_size를 넘으면 413으로 바로 끊습니다.
+    """
+
+    max_decompressed_size: int = MAX_DECOMPRESSED_SIZE
+
+    def content_encodings(self) -> List[str]:
+        encodings = [
+            encoding.strip().lower()
+            for value in self.headers.getlist("Content-Encoding")
+            for encoding in value.split(",")
+        ]
+        return [encoding for encoding in encodings if encoding and encoding != "identity"]
+
+    async def stream(self) -> AsyncGenerator[bytes, None]:
+        encodings = self.content_encodings()
+        if hasattr(self, "_body") or not encodings:
+            async for chunk in super().stream():
+                yield chunk
+            return
+
+        unsupported = [encoding for encoding in encodings if encoding not in DECODERS]
+        if unsupported:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported Content-Encoding: {', '.join(unsupported)}",
+            )
+        # 마지막에 적용된 인코딩부터 풉니다.
+        decoders = [DECODERS[encoding]() for encoding in reversed(encodings)]
+        size = 0
+        try:
+            async for data in self._decompressed(decoders):
+                size += len(data)
+                if size > self.max_decompressed_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Decompressed body is too large",
+                    )
+                yield data
+        except (zlib.error, getattr(brotli, "error", zlib.error)):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid compressed body")
+        yield b""
+
+    async def _decompressed(self, decoders) -> AsyncGenerator[bytes, None]:
+        async for chunk in super().stream():
+            for data in self._decode(decoders, chunk):
+                yield data
+        for index, decoder in enumerate(decoders):
+            for data in self._decode(decoders, decoder.flush(), index + 1):
+                yield data
+
+    @staticmethod
+    def _decode(decoders, data: bytes, start: int = 0):
+        if start == len(decoders):
+            if data:
+                yield data
+            return
+        decoder = decoders[start]
+        output = decoder.decompress(data, DECOMPRESS_CHUNK_SIZE)
+        while output:
+            yield from GzipRequest._decode(decoders, output, start + 1)
+            output = decoder.decompress(b"", DECOMPRESS_CHUNK_SIZE)
 
 
 class GzipRoute(APIRoute):
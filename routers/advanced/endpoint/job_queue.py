@@ -0,0 +1,367 @@
+import asyncio
+import fcntl
+import importlib
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple, Union
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from routers.advanced.endpoint.metrics import LatencyHistogram
+
+JOB_JOURNAL_PATH = os.environ.get("JOB_JOURNAL_PATH", "jobs.journal")
+JOB_WORKERS = 4
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE = 0.5  # 초, 실패할 때마다 두배
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+JOURNAL_MAX_SLOTS = 64
+
+logger = logging.getLogger("job_queue")
+
+
+@dataclass
+class Job:
+    id: str
+    name: str
+    args: list
+    kwargs: dict
+    enqueued_at: float = field(default_factory=time.time)
+    attempts: int = 0
+
+    def record(self) -> dict:
+        return {"op": "enqueue", "id": self.id, "name": self.name, "args": self.args,
+                "kwargs": self.kwargs, "enqueued_at": self.enqueued_at}
+
+
+def job_name(func: Callable) -> str:
+    # journal에서 다시 불러올 수 있도록 모듈 수준 함수만 받습니다.
+    if "<" in func.__qualname__:
+        raise ValueError(f"{func.__qualname__} is not a module-level function")
+    return f"{func.__module__}:{func.__qualname__}"
+
+
+def resolve_job(name: str) -> Callable:
+    module, qualname = name.split(":")
+    func = importlib.import_module(module)
+    for attr in qualname.split("."):
+        func = getattr(func, attr)
+    return func
+
+
+class JobStats:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.enqueued = 0
+        self.recovered = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+        self.journal_records = 0
+        self.fsync_time_total = 0.0
+        self.fsync_time_max = 0.0
+        self.lag = LatencyHistogram()
+
+    def record_batch(self, size: int, fsync_time: float):
+        self.batches += 1
+        self.journal_records += size
+        self.fsync_time_total += fsync_time
+        self.fsync_time_max = max(self.fsync_time_max, fsync_time)
+
+    def as_dict(self):
+        batches = self.batches or 1
+        return {
+            "enqueued": self.enqueued,
+            "recovered": self.recovered,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "throughput": self.completed / max(time.monotonic() - self.started_at, 1e-9),
+            "lag_p50": self.lag.quantile(0.5) / 1e6,
+            "lag_p99": self.lag.quantile(0.99) / 1e6,
+            "lag_max": self.lag.max / 1e6,
+            "batches": self.batches,
+            "batch_size_avg": self.journal_records / batches,
+            "fsync_time_avg": self.fsync_time_total / batches,
+            "fsync_time_max": self.fsync_time_max,
+        }
+
+
+def journal_unavailable() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Job journal is unavailable")
+
+
+def _retrieve_exception(future: asyncio.Future):
+    # journal 실패는 _journal_writer가 이미 로그로 남기므로, 기다리지 않은 future의 경고만 막습니다.
+    if not future.cancelled():
+        future.exception()
+
+
+class JobQueue:
+    """
+    append-only journal에 기록한 뒤 실행하는 in-process 작업 큐.
+    enqueue 기록은 모아서 한번에 쓰고 fsync도 batch마다 한번만 합니다.
+    완료/실패 기록이 없는 작업은 재시작할 때 journal에서 다시 불러오므로, 작업은 최소 한번 실행됩니다.
+    실패한 작업은 retry_base * 2^(시도 횟수 - 1)초 뒤에 max_attempts까지 다시 실행합니다.
+
+    journal 파일 하나에는 프로세스 하나만 씁니다. 시작할 때 journal_path, journal_path.1, journal_path.2, ...
+    순서로 잠기지 않은 슬롯을 하나 골라 <슬롯>.lock에 flock을 걸고, 그 슬롯의 journal만 복구하고 씁니다.
+    worker가 여러 개여도 서로의 journal을 덮어쓰거나 남의 작업을 다시 실행하지 않고,
+    재시작한 worker는 비어 있는 슬롯을 이어받아 끝나지 않은 작업을 실행합니다.
+    """
+
+    def __init__(self, journal_path: str = JOB_JOURNAL_PATH, workers: int = JOB_WORKERS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, retry_base: float = JOB_RETRY_BASE):
+        self.journal_path = journal_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.stats = JobStats()
+        self._functions: Dict[str, Callable] = {}
+        self._pending: Dict[str, Job] = {}
+        self._records: List[Tuple[str, Union[asyncio.Future, None], Union[Job, None]]] = []
+        self._retries: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Union[asyncio.AbstractEventLoop, None] = None
+        self._queue: Union[asyncio.Queue, None] = None
+        self._wakeup: Union[asyncio.Event, None] = None
+        self._closing = False
+        self._file = None
+        self._lock_file = None
+        self.active_path: Union[str, None] = None
+        self._journal_size = 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self.active_path, self._lock_file = self._claim_journal()
+        for job in self.recover():
+            self._pending[job.id] = job
+            self._ready(job)
+        self._file = open(self.active_path, "ab")
+        self._journal_size = self._file.tell()
+        self._tasks = [self._loop.create_task(self._journal_writer())]
+        self._tasks += [self._loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """
+        쌓인 journal 기록을 쓰고 worker를 멈춥니다. 실행 중이던 작업은 다음 시작 때 다시 실행됩니다.
+        """
+        if not self._tasks:
+            return
+        writer, *workers = self._tasks
+        self._closing = True
+        self._wakeup.set()
+        await writer
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        self._pending.clear()
+        self._tasks = []
+        self._loop = None
+        self._file.close()
+        self._file = None
+        self._lock_file.close()
+        self._lock_file = None
+
+    def _claim_journal(self):
+        for slot in range(JOURNAL_MAX_SLOTS):
+            path = self.journal_path if slot == 0 else f"{self.journal_path}.{slot}"
+            lock_file = open(f"{path}.lock", "ab")
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            return path, lock_file
+        raise RuntimeError(f"all {JOURNAL_MAX_SLOTS} job journal slots for {self.journal_path} are in use")
+
+    def recover(self) -> List[Job]:
+        """
+        이 프로세스가 잡은 journal에서 끝나지 않은 작업을 읽고, 그 작업들만 남기도록 journal을 다시 씁니다.
+        """
+        jobs: Dict[str, Job] = {}
+        if os.path.exists(self.active_path):
+            with open(self.active_path, "rb") as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 기록 도중 종료되어 잘린 마지막 줄
+                        continue
+                    if record["op"] == "enqueue":
+                        jobs[record["id"]] = Job(record["id"], record["name"], record["args"],
+                                                 record["kwargs"], record["enqueued_at"])
+                    else:
+                        jobs.pop(record["id"], None)
+        compacted = f"{self.active_path}.tmp"
+        with open(compacted, "wb") as journal:
+            journal.writelines(json.dumps(job.record()).encode() + b"\n" for job in jobs.values())
+            journal.flush()
+            os.fsync(journal.fileno())
+        # 잠금은 .lock 파일에 걸려 있으므로 journal은 rename으로 바꿔도 됩니다.
+        os.replace(compacted, self.active_path)
+        self.stats.recovered += len(jobs)
+        return list(jobs.values())
+
+    def submit(self, func: Callable, *args, **kwargs) -> asyncio.Future:
+        """
+        작업을 journal 기록 대기열에 넣습니다. 반환된 future는 journal에 fsync된 뒤 작업 id로 끝납니다.
+        큐를 시작한 이벤트 루프에서 불러야 하고, 아직 시작하지 않았으면 여기서 시작합니다.
+        """
+        name = job_name(func)
+        self.start()
+        if asyncio.get_running_loop() is not self._loop:
+            raise RuntimeError("JobQueue.submit must be called from the event loop that started the queue")
+        self._functions[name] = func
+        job = Job(uuid.uuid4().hex, name, list(args), kwargs)
+        future = self._loop.create_future()
+        self._append(json.dumps(job.record()), future, job)
+        return future
+
+    async def enqueue(self, func: Callable, *args, **kwargs) -> str:
+        """
+        작업이 journal에 fsync될 때까지 기다렸다가 작업 id를 반환합니다. journal에 쓰지 못하면 503으로 거절합니다.
+        """
+        try:
+            return await self.submit(func, *args, **kwargs)
+        except OSError:
+            raise journal_unavailable()
+
+    def _append(self, line: str, future: Union[asyncio.Future, None] = None, job: Union[Job, None] = None):
+        if job is not None:
+            self.stats.enqueued += 1
+        self._records.append((line, future, job))
+        self._wakeup.set()
+
+    async def _journal_writer(self):
+        # 쓰는 동안 들어온 기록은 다음 batch로 모입니다.
+        while not (self._closing and not self._records):
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            batch, self._records = self._records, []
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                await self._loop.run_in_executor(None, self._write, [line for line, _, _ in batch])
+            except Exception as exc:
+                logger.exception("job journal write failed")
+                for _, future, _ in batch:
+                    if future is not None and not future.done():
+                        future.set_exception(exc)
+                continue
+            self.stats.record_batch(len(batch), time.perf_counter() - started)
+            for _, future, job in batch:
+                if job is not None:
+                    self._pending[job.id] = job
+                    if not self._closing:
+                        self._ready(job)
+                if future is not None and not future.done():
+                    future.set_result(job.id)
+            if self._journal_size > JOURNAL_COMPACT_BYTES and not self._pending and not self._records:
+                await self._loop.run_in_executor(None, self._truncate)
+
+    def _write(self, lines: List[str]):
+        data = ("\n".join(lines) + "\n").encode()
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._journal_size += len(data)
+
+    def _truncate(self):
+        self._file.truncate(0)
+        os.fsync(self._file.fileno())
+        self._journal_size = 0
+
+    def _ready(self, job: Job):
+        self._retries.pop(job.id, None)
+        self._queue.put_nowait(job)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.attempts == 0:
+                self.stats.lag.record(int(max(time.time() - job.enqueued_at, 0) * 1e6))
+            try:
+                func = self._functions.get(job.name)
+                if func is None:
+                    func = self._functions[job.name] = resolve_job(job.name)
+                if asyncio.iscoroutinefunction(func):
+                    await func(*job.args, **job.kwargs)
+                else:
+                    await run_in_threadpool(func, *job.args, **job.kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                job.attempts += 1
+                if job.attempts >= self.max_attempts:
+                    logger.exception("job %s (%s) failed after %d attempts", job.id, job.name, job.attempts)
+                    self.stats.failed += 1
+                    self._finish(job, "failed")
+                else:
+                    self.stats.retried += 1
+                    delay = self.retry_base * 2 ** (job.attempts - 1)
+                    self._retries[job.id] = self._loop.call_later(delay, self._ready, job)
+            else:
+                self.stats.completed += 1
+                self._finish(job, "done")
+
+    def _finish(self, job: Job, op: str):
+        self._pending.pop(job.id, None)
+        self._append(json.dumps({"op": op, "id": job.id}))
+
+    def job_stats(self):
+        stats = self.stats.as_dict()
+        stats.update(
+            queued=self._queue.qsize() if self._queue is not None else 0,
+            pending=len(self._pending),
+            retrying=len(self._retries),
+            workers=self.workers,
+        )
+        return stats
+
+
+job_queue = JobQueue()
+
+
+class DurableBackgroundTasks:
+    """
+    BackgroundTasks와 같은 add_task로 작업을 받지만, 응답 뒤에 요청 worker에서 실행하는 대신 job_queue에 넘깁니다.
+    add_task는 기다리지 않고 journal 기록 future를 돌려줍니다. 응답 전에 작업이 디스크에 남아야 하면
+    await flush()로 그때까지 넣은 작업의 fsync를 기다립니다(journal에 쓰지 못하면 503).
+    작업 함수는 모듈 수준 함수여야 하고, 인자는 JSON으로 저장할 수 있어야 합니다.
+    """
+
+    def __init__(self, queue: JobQueue = job_queue):
+        self.queue = queue
+        self._futures: List[asyncio.Future] = []
+
+    def add_task(self, func: Callable, *args, **kwargs) -> asyncio.Future:
+        future = self.queue.submit(func, *args, **kwargs)
+        future.add_done_callback(_retrieve_exception)
+        self._futures.append(future)
+        return future
+
+    async def flush(self) -> List[str]:
+        futures, self._futures = self._futures, []
+        try:
+            return list(await asyncio.gather(*futures))
+        except OSError:
+            raise journal_unavailable()
+
+
+async def durable_background_tasks() -> DurableBackgroundTasks:
+    return DurableBackgroundTasks(job_queue)
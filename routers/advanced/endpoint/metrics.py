@@ -0,0 +1,170 @@
+import time
+from typing import Callable, Dict, List, Tuple
+
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SUB_BUCKET_BITS = 4  # 2의 거듭제곱 구간마다 16개 선형 구간, 상대 오차 약 6%
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+QUANTILES = (0.5, 0.95, 0.99)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class LatencyHistogram:
+    """
+    HDR 방식의 로그-선형 히스토그램. 마이크로초 단위 값을 고정된 구간에 세기만 하므로
+    기록 비용이 요청 수와 관계없이 일정합니다.
+    """
+
+    def __init__(self):
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def bucket_index(value: int) -> int:
+        if value < 2 * SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return shift * SUB_BUCKETS + (value >> shift)
+
+    @staticmethod
+    def bucket_upper(index: int) -> int:
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        sub = index - shift * SUB_BUCKETS
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value: int):
+        index = self.bucket_index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> int:
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self.bucket_upper(index), self.max)
+        return self.max
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+
+    def record(self, method: str, route: str, status_code: int, duration: int):
+        key = (method, route)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(duration)
+        counter_key = (method, route, status_code)
+        self.requests[counter_key] = self.requests.get(counter_key, 0) + 1
+
+    def render(self) -> str:
+        """
+        Prometheus text 형식으로 출력합니다.
+        """
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route template.",
+            "# TYPE http_request_duration_seconds summary",
+        ]
+        for (method, route), histogram in sorted(self.histograms.items()):
+            labels = f'method="{method}",route="{route}"'
+            for q in QUANTILES:
+                lines.append(
+                    f'http_request_duration_seconds{{{labels},quantile="{q}"}} {histogram.quantile(q) / 1e6}'
+                )
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.total / 1e6}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+        lines += [
+            "# HELP http_request_duration_seconds_max Slowest request by route template.",
+            "# TYPE http_request_duration_seconds_max gauge",
+        ]
+        for (method, route), histogram in sorted(self.histograms.items()):
+            lines.append(
+                f'http_request_duration_seconds_max{{method="{method}",route="{route}"}} {histogram.max / 1e6}'
+            )
+        lines += [
+            "# HELP http_requests_total Requests by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status_code), count in sorted(self.requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status_code}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """
+    요청 시간을 route 템플릿별 히스토그램에 기록하는 ASGI 미들웨어.
+    BaseHTTPMiddleware와 달리 요청/응답을 감싸는 task나 stream을 만들지 않습니다.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics, process_time_header: bool = True):
+        self.app = app
+        self.metrics = metrics
+        self.process_time_header = process_time_header
+        self._route_paths: Dict[Callable, str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        status_code = 500
+        # mount된 하위 앱이 scope["app"]을 바꾸기 전에 최상위 앱을 잡아 둡니다.
+        app = scope.get("app")
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.process_time_header:
+                    process_time = (time.perf_counter_ns() - start) / 1e9
+                    message["headers"] = [*message.get("headers", []), (b"x-process-time", str(process_time).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = (time.perf_counter_ns() - start) // 1000
+            self.metrics.record(scope["method"], self.route_path(app, scope), status_code, duration)
+
+    def route_path(self, app, scope: Scope) -> str:
+        # router가 scope에 넣어 둔 endpoint로 경로 템플릿을 찾고, 한번 찾은 결과는 저장해 둡니다.
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = self._route_paths[endpoint] = find_route_path(app.routes, endpoint) or UNMATCHED_ROUTE
+        return path
+
+
+def find_route_path(routes, endpoint, prefix: str = ""):
+    for route in routes:
+        if isinstance(route, Mount):
+            if route.app is endpoint:
+                return prefix + route.path + "/{path}"
+            path = find_route_path(route.routes, endpoint, prefix + route.path)
+            if path:
+                return path
+        elif getattr(route, "endpoint", None) is endpoint:
+            return prefix + route.path
+    return None
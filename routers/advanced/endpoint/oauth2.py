@@ -8,9 +8,12 @@ from fastapi.security import (
     SecurityScopes,
 )
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel, ValidationError
 
+from routers.advanced.endpoint.password_hasher import password_hasher
+from routers.advanced.endpoint.token_cache import TokenCache
+from routers.advanced.endpoint.user_store import user_store_from_env
+
 # to get a string like this run:
 # openssl rand -hex 32
 SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
@@ -57,11 +60,19 @@ class UserInDB(User):
     hashed_password: str
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = password_hasher.context
+
+token_cache = TokenCache()
+
+user_store = user_store_from_env(fake_users_db)
+# 사용자가 비활성화되거나 바뀌면 그 사용자의 토큰 캐시를 비워 다음 요청에서 다시 확인합니다.
+user_store.subscribe(token_cache.revoke_user)
+
+SCOPES = {"me": "Read information about the current user.", "items": "Read items."}
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="advanced/oauth2/token",
-    scopes={"me": "Read information about the current user.", "items": "Read items."},
+    scopes=SCOPES,
 )
 
 router = APIRouter(
@@ -77,17 +88,15 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
-def get_user(db, username: str):
-    if username in db:
-        user_dict = db[username]
-        return UserInDB(**user_dict)
-
-
-def authenticate_user(fake_db, username: str, password: str):
-    user = get_user(fake_db, username)
+async def authenticate_user(username: str, password: str):
+    user = await user_store.get(username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    try:
+        verified = await password_hasher.verify(password, user.hashed_password)
+    except ValueError:  # passlib이 알아보지 못하는 해시
+        return False
+    if not verified:
         return False
     return user
 
@@ -103,37 +112,49 @@ def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None
     return encoded_jwt
 
 
+def authenticate_value(security_scopes: SecurityScopes) -> str:
+    return f'Bearer scope="{security_scopes.scope_str}"' if security_scopes.scopes else "Bearer"
+
+
+def credentials_error(security_scopes: SecurityScopes) -> HTTPException:
+    # 예외는 실패할 때만 만듭니다. 성공 경로에서는 WWW-Authenticate 값도 만들지 않습니다.
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": authenticate_value(security_scopes)},
+    )
+
+
 async def get_current_user(
     security_scopes: SecurityScopes, token: str = Depends(oauth2_scheme)
 ):
-    if security_scopes.scopes:
-        authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
+    if token_cache.is_revoked(token):
+        raise credentials_error(security_scopes)
+    cached = token_cache.get(token)
+    if cached is not None:
+        token_scopes, user = cached
     else:
-        authenticate_value = "Bearer"
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": authenticate_value},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_scopes = payload.get("scopes", [])
-        token_data = TokenData(scopes=token_scopes, username=username)
-    except (JWTError, ValidationError):
-        raise credentials_exception
-    user = get_user(fake_users_db, username=token_data.username)
-    if user is None:
-        raise credentials_exception
-    for scope in security_scopes.scopes:
-        if scope not in token_data.scopes:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Not enough permissions",
-                headers={"WWW-Authenticate": authenticate_value},
-            )
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            expires_at = payload.get("exp")
+            # exp가 없는 토큰은 캐시와 무효화 목록에 둘 기한이 없으므로 받지 않습니다.
+            if username is None or expires_at is None:
+                raise credentials_error(security_scopes)
+            token_data = TokenData(scopes=payload.get("scopes", []), username=username)
+        except (JWTError, ValidationError):
+            raise credentials_error(security_scopes)
+        user = await user_store.get(token_data.username)
+        if user is None:
+            raise credentials_error(security_scopes)
+        token_scopes = frozenset(token_data.scopes)
+        token_cache.set(token, expires_at, user.username, (token_scopes, user))
+    if not token_scopes.issuperset(security_scopes.scopes):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not enough permissions",
+            headers={"WWW-Authenticate": authenticate_value(security_scopes)},
+        )
     return user
 
 
@@ -147,7 +168,7 @@ async def get_current_active_user(
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(fake_users_db, form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -158,6 +179,28 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    if payload.get("exp") is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    token_cache.revoke(token, payload["exp"])
+    return {"message": "Token revoked"}
+
+
+@router.get("/password-hasher/stats")
+async def read_password_hasher_stats():
+    return password_hasher.executor.executor_stats()
+
+
+@router.get("/user-store/stats")
+async def read_user_store_stats():
+    return user_store.store_stats()
+
+
 @router.get("/users/me/", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
@@ -172,4 +215,4 @@ async def read_own_items(
 
 @router.get("/status/")
 async def read_system_status(current_user: User = Depends(get_current_user)):
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
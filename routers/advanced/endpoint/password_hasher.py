@@ -0,0 +1,35 @@
+import os
+
+from passlib.context import CryptContext
+
+from routers.advanced.endpoint.bounded_executor import BoundedExecutor
+
+PASSWORD_HASHER_WORKERS = os.cpu_count() or 1
+PASSWORD_HASHER_MAX_QUEUE = 32
+PASSWORD_HASHER_RETRY_AFTER = 1  # 초
+
+
+class PasswordHasher:
+    """
+    bcrypt 해시/검증을 전용 BoundedExecutor에서 실행합니다.
+    bcrypt는 계산하는 동안 GIL을 놓기 때문에 스레드로도 코어 수만큼 동시에 돌고, 이벤트 루프는 막히지 않습니다.
+    """
+
+    def __init__(self, context: CryptContext, executor: BoundedExecutor):
+        self.context = context
+        self.executor = executor
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.executor.run(self.context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self.executor.run(self.context.hash, password)
+
+
+password_hasher = PasswordHasher(
+    CryptContext(schemes=["bcrypt"], deprecated="auto"),
+    BoundedExecutor(
+        PASSWORD_HASHER_WORKERS, PASSWORD_HASHER_MAX_QUEUE, PASSWORD_HASHER_RETRY_AFTER,
+        busy_detail="Too many login attempts in progress", thread_name_prefix="password-hasher",
+    ),
+)
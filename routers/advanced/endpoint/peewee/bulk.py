@@ -0,0 +1,68 @@
+import json
+from typing import AsyncIterator, List, Tuple, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+from .schemas import BulkResult
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def bulk_openapi(model: Type[BaseModel]) -> dict:
+    schema = {"type": "array", "items": {"$ref": f"#/components/schemas/{model.__name__}"}}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": schema},
+                NDJSON_MEDIA_TYPE: {"schema": {"$ref": f"#/components/schemas/{model.__name__}"}},
+            },
+        }
+    }
+
+
+async def iter_json_rows(request: Request) -> AsyncIterator:
+    """
+    JSON 배열 본문은 한번에, NDJSON 본문은 줄 단위로 읽으면서 행을 돌려줍니다.
+    """
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        buffer = b""
+        async for chunk in request.stream():
+            lines = (buffer + chunk).split(b"\n")
+            buffer = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array")
+    for row in body:
+        yield row
+
+
+async def iter_bulk_chunks(
+    request: Request, model: Type[BaseModel], chunk_size: int
+) -> AsyncIterator[Tuple[List[Tuple[int, BaseModel]], List[BulkResult]]]:
+    chunk, errors = [], []
+    index = 0
+    async for raw in iter_json_rows(request):
+        try:
+            row = model.parse_raw(raw) if isinstance(raw, bytes) else model.parse_obj(raw)
+        except ValidationError as exc:
+            errors.append(BulkResult(index=index, status="invalid", detail=str(exc)))
+        else:
+            chunk.append((index, row))
+        index += 1
+        if len(chunk) >= chunk_size:
+            yield chunk, errors
+            chunk, errors = [], []
+    if chunk or errors:
+        yield chunk, errors
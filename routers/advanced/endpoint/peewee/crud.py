@@ -1,30 +1,201 @@
+import threading
+from typing import Dict, List, Tuple, Union
+
+import peewee
+
 from . import models, schemas
+from .cache import user_cache
+
+BULK_CHUNK_SIZE = 1000
+CACHE_GENERATIONS_MAX = 10000
+
+# 키별 세대 번호. 쓰기가 세대를 올리고 지우면, 그 전에 읽기 시작한 로더는 캐시에 넣지 않습니다.
+# 표가 커지면 비우는 대신 epoch를 올려 그때 진행 중이던 로더도 모두 버리게 합니다.
+_generation_lock = threading.Lock()
+_generations: Dict[str, int] = {}
+_epoch = 0
+
+
+def user_key(user_id: int):
+    return f"user:{user_id}"
+
+
+def user_email_key(email: str):
+    return f"user_email:{email}"
+
+
+def cache_generation(key: str) -> Tuple[int, int]:
+    with _generation_lock:
+        return _epoch, _generations.get(key, 0)
+
+
+def invalidate_cache(key: str):
+    global _epoch
+    with _generation_lock:
+        if len(_generations) >= CACHE_GENERATIONS_MAX:
+            _generations.clear()
+            _epoch += 1
+        _generations[key] = _generations.get(key, 0) + 1
+        user_cache.delete(key)
+
+
+def cache_if_current(key: str, generation: Tuple[int, int], value):
+    with _generation_lock:
+        if (_epoch, _generations.get(key, 0)) == generation:
+            user_cache.set(key, value)
+
+
+def load_user(*where, user_id: Union[int, None] = None) -> Union[schemas.User, None]:
+    generation = cache_generation(user_key(user_id)) if user_id is not None else None
+    query = models.User.select().where(*where).limit(1)
+    db_user = next(iter(peewee.prefetch(query, models.Item)), None)
+    if db_user is None:
+        return None
+    user = schemas.User.from_orm(db_user)
+    if generation is not None:
+        cache_if_current(user_key(user.id), generation, user)
+    # id를 모르고 email로 읽은 경우에는 세대를 미리 잡을 수 없으므로 id 매핑만 저장합니다(email은 바뀌지 않습니다).
+    user_cache.set(user_email_key(user.email), user.id)
+    return user
 
 
 def get_user(user_id: int):
-    return models.User.filter(models.User.id == user_id).first()
+    user = user_cache.get(user_key(user_id))
+    if user is None:
+        user = load_user(models.User.id == user_id, user_id=user_id)
+    return user
 
 
 def get_user_by_email(email: str):
-    return models.User.filter(models.User.email == email).first()
+    # email -> id 매핑만 따로 저장해 item이 바뀌어도 user:{id} 항목 하나만 지우면 되게 합니다.
+    user_id = user_cache.get(user_email_key(email))
+    if user_id is not None:
+        return get_user(user_id)
+    return load_user(models.User.email == email)
+
 
+def paginate(query, model, skip: int = 0, limit: int = 100, after: Union[int, None] = None):
+    query = query.order_by(model.id)
+    if after is not None:
+        query = query.where(model.id > after)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
 
-def get_users(skip: int = 0, limit: int = 100):
-    return list(models.User.select().offset(skip).limit(limit))
+
+def get_users(skip: int = 0, limit: int = 100, after: Union[int, None] = None):
+    # items backref를 한번의 IN 쿼리로 미리 채워 사용자별 N+1 쿼리를 막습니다.
+    users = paginate(models.User.select(), models.User, skip, limit, after)
+    return peewee.prefetch(users, models.Item)
+
+
+def fake_hash_password(password: str):
+    return password + "notreallyhashed"
+
+
+def export_users_query():
+    return (
+        models.User.select(models.User.id, models.User.email, models.User.is_active)
+        .order_by(models.User.id)
+        .dicts()
+    )
 
 
 def create_user(user: schemas.UserCreate):
-    fake_hashed_password = user.password + "notreallyhashed"
+    fake_hashed_password = fake_hash_password(user.password)
     db_user = models.User(email=user.email, hashed_password=fake_hashed_password)
     db_user.save()
-    return db_user
+    # 응답 직렬화 때 items를 조회하지 않도록 연결이 있는 작업 안에서 스키마로 바꿉니다.
+    return schemas.User.from_orm(db_user)
+
 
+def get_items(skip: int = 0, limit: int = 100, after: Union[int, None] = None):
+    return list(paginate(models.Item.select(), models.Item, skip, limit, after))
 
-def get_items(skip: int = 0, limit: int = 100):
-    return list(models.Item.select().offset(skip).limit(limit))
+
+def export_items_query():
+    return (
+        models.Item.select(models.Item.id, models.Item.title, models.Item.description,
+                           models.Item.owner.alias("owner_id"))
+        .order_by(models.Item.id)
+        .dicts()
+    )
 
 
 def create_user_item(item: schemas.ItemCreate, user_id: int):
     db_item = models.Item(**item.dict(), owner_id=user_id)
     db_item.save()
-    return db_item
\ No newline at end of file
+    invalidate_cache(user_key(user_id))
+    return db_item
+
+
+class BulkConflict(Exception):
+    """
+    미리 걸러낸 뒤에도 다른 요청이 같은 email을 먼저 넣어 insert가 unique 제약에 걸렸을 때 올립니다.
+    트랜잭션은 롤백되어 이 묶음은 하나도 저장되지 않습니다. rows는 묶음의 행마다 결과입니다
+    (충돌한 행은 duplicate, 같이 롤백된 행은 rolled_back).
+    """
+
+    def __init__(self, rows: List[schemas.BulkResult]):
+        super().__init__("Email already registered")
+        self.rows = rows
+
+
+def existing_emails(emails) -> set:
+    return {row.email for row in models.User.select(models.User.email).where(models.User.email.in_(emails))}
+
+
+def create_users_bulk(users: List[Tuple[int, schemas.UserCreate]], seen: set = None) -> List[schemas.BulkResult]:
+    """
+    (index, user) 묶음을 한 트랜잭션에서 저장합니다.
+    이미 등록된 email은 한번의 IN 쿼리로 걸러내고, 나머지는 insert_many로 한번에 넣습니다.
+    seen은 여러 묶음에 걸친 요청 안에서 중복된 email을 거르기 위해 호출하는 쪽이 유지하며, 커밋된 묶음의 email만 더합니다.
+    """
+    seen = set() if seen is None else seen
+    results: Dict[int, schemas.BulkResult] = {}
+    pending = {}
+    try:
+        with models.User._meta.database.atomic():
+            existing = existing_emails({user.email for _, user in users})
+            for index, user in users:
+                if user.email in existing or user.email in seen or user.email in pending:
+                    results[index] = schemas.BulkResult(
+                        index=index, status="duplicate", detail="Email already registered"
+                    )
+                    continue
+                pending[user.email] = index
+            if pending:
+                rows = [
+                    {"email": user.email, "hashed_password": fake_hash_password(user.password)}
+                    for index, user in users
+                    if pending.get(user.email) == index
+                ]
+                query = models.User.insert_many(rows).returning(models.User.id, models.User.email)
+                for user_id, email in query.tuples().execute():
+                    index = pending[email]
+                    results[index] = schemas.BulkResult(index=index, status="created", id=user_id)
+    except peewee.IntegrityError:
+        conflicts = existing_emails(set(pending))
+        for email, index in pending.items():
+            if email in conflicts:
+                results[index] = schemas.BulkResult(index=index, status="duplicate", detail="Email already registered")
+            else:
+                results[index] = schemas.BulkResult(
+                    index=index, status="rolled_back", detail="Another row in the same chunk conflicted"
+                )
+        raise BulkConflict([results[index] for index, _ in users])
+    seen.update(pending)
+    return [results[index] for index, _ in users]
+
+
+def create_user_items_bulk(items: List[Tuple[int, schemas.ItemCreate]], user_id: int) -> List[schemas.BulkResult]:
+    with models.Item._meta.database.atomic():
+        rows = [{**item.dict(), "owner": user_id} for _, item in items]
+        query = models.Item.insert_many(rows).returning(models.Item.id)
+        # RETURNING 순서는 보장되지 않지만 한 INSERT 안의 rowid는 입력 순서대로 증가합니다.
+        ids = sorted(item_id for item_id, in query.tuples().execute())
+    invalidate_cache(user_key(user_id))
+    return [
+        schemas.BulkResult(index=index, status="created", id=item_id)
+        for (index, _), item_id in zip(items, ids)
+    ]
\ No newline at end of file
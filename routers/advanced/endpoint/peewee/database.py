@@ -1,8 +1,24 @@
+import heapq
+import os
+import threading
+import time
+from contextlib import contextmanager
 from contextvars import ContextVar
 
 import peewee
+from playhouse.pool import PooledSqliteDatabase
+
+DATABASE_NAME = os.environ.get("DATABASE_NAME", "test.db")
+POOL_MAX_CONNECTIONS = 8
+POOL_IDLE_TIMEOUT = 300  # 풀에 돌아온 뒤 5분 동안 쓰이지 않은 연결은 닫음
+POOL_WAIT_TIMEOUT = 10  # 풀이 가득 찼을 때 checkout 대기 시간(초)
+PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -1024 * 16,
+    "foreign_keys": 1,
+}
 
-DATABASE_NAME = "test.db"
 db_state_default = {"closed": None, "conn": None, "ctx": None, "transactions": None}
 db_state = ContextVar("db_state", default=db_state_default.copy())
 
@@ -19,6 +35,170 @@ class PeeweeConnectionState(peewee._ConnectionState):
         return self._state.get()[name]
 
 
-db = peewee.SqliteDatabase(DATABASE_NAME, check_same_thread=False)
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.created = 0
+        self.evicted = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_checkout(self, wait_time: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def record_created(self):
+        with self._lock:
+            self.created += 1
+
+    def record_evicted(self, count: int):
+        with self._lock:
+            self.evicted += count
+
+    def as_dict(self):
+        with self._lock:
+            hits = max(0, self.checkouts - self.created)
+            return {
+                "checkouts": self.checkouts,
+                "created": self.created,
+                "evicted": self.evicted,
+                "hits": hits,
+                "hit_rate": hits / self.checkouts if self.checkouts else 0.0,
+                "wait_time_avg": self.wait_time_total / self.checkouts if self.checkouts else 0.0,
+                "wait_time_max": self.wait_time_max,
+            }
+
+
+class StatsPooledSqliteDatabase(PooledSqliteDatabase):
+    """
+    checkout 대기 시간과 연결 재사용률을 기록하는 SQLite 연결 풀.
+    pragma는 새 연결이 만들어질 때 한번만 적용되고, 이후에는 풀에서 재사용합니다.
+    peewee의 stale_timeout은 연결이 만들어진 뒤의 나이를 보므로, 대신 마지막으로 풀에 돌아온 시각을 기록해
+    idle_timeout보다 오래 쉬고 있던 연결을 checkout 때 닫습니다.
+    """
+
+    def __init__(self, *args, idle_timeout: float = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.idle_timeout = idle_timeout
+        self.stats = PoolStats()
+        self.query_listeners = []
+        self._checked_in = {}
+
+    def connect(self, reuse_if_open=False):
+        start = time.perf_counter()
+        result = super().connect(reuse_if_open)
+        self.stats.record_checkout(time.perf_counter() - start)
+        return result
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        for listener in self.query_listeners:
+            listener(sql, params)
+        return super().execute_sql(sql, params, *args, **kwargs)
+
+    def _connect(self):
+        with self._pool_lock:
+            self.evict_idle()
+            conn = super()._connect()
+            self._checked_in.pop(self.conn_key(conn), None)
+            return conn
+
+    def _close(self, conn, close_conn=False):
+        with self._pool_lock:
+            key = self.conn_key(conn)
+            if close_conn:
+                self._checked_in.pop(key, None)
+            elif key in self._in_use:
+                self._checked_in[key] = time.time()
+            super()._close(conn, close_conn)
+
+    def evict_idle(self) -> int:
+        if not self.idle_timeout:
+            return 0
+        with self._pool_lock:
+            cutoff = time.time() - self.idle_timeout
+            keep, evicted = [], []
+            for entry in self._connections:
+                conn = entry[2]
+                if self._checked_in.get(self.conn_key(conn), cutoff) < cutoff:
+                    evicted.append(conn)
+                else:
+                    keep.append(entry)
+            if not evicted:
+                return 0
+            heapq.heapify(keep)
+            self._connections = keep
+            for conn in evicted:
+                self._close(conn, close_conn=True)
+        self.stats.record_evicted(len(evicted))
+        return len(evicted)
+
+    def _add_conn_hooks(self, conn):
+        super()._add_conn_hooks(conn)
+        self.stats.record_created()
+
+    def warm_up(self, size: int = None):
+        conns = [self._connect() for _ in range(size or self._max_connections)]
+        for conn in conns:
+            self._close(conn)
+        # warm-up에서 만든 연결은 hit rate 집계에서 제외
+        self.stats = PoolStats()
+
+    def pool_stats(self):
+        stats = self.stats.as_dict()
+        stats.update(
+            in_use=len(self._in_use),
+            idle=len(self._connections),
+            max_connections=self._max_connections,
+            idle_timeout=self.idle_timeout,
+        )
+        return stats
+
+
+@contextmanager
+def connection_scope(database=None):
+    """
+    작업 하나 동안만 풀에서 연결을 빌리고 돌려줍니다. db_executor의 작업마다 쓰므로
+    연결을 기다리는 동안 작업 스레드를 잡고 있는 다른 요청이 없어 풀과 스레드가 서로를 기다리지 않습니다.
+    """
+    database = database or db
+    # 같은 요청의 다른 작업과 연결 상태가 섞이지 않도록 새 상태로 시작합니다.
+    db_state.set(db_state_default.copy())
+    database._state.reset()
+    database.connect()
+    try:
+        yield
+    finally:
+        if not database.is_closed():
+            database.close()
+
+
+@contextmanager
+def capture_queries(database=None):
+    """
+    블록 안에서 실행된 SQL 문을 모읍니다. 요청당 쿼리 수를 테스트할 때 사용합니다.
+    """
+    database = database or db
+    queries = []
+    listener = lambda sql, params: queries.append(sql)
+    database.query_listeners.append(listener)
+    try:
+        yield queries
+    finally:
+        database.query_listeners.remove(listener)
+
+
+db = StatsPooledSqliteDatabase(
+    DATABASE_NAME,
+    max_connections=POOL_MAX_CONNECTIONS,
+    idle_timeout=POOL_IDLE_TIMEOUT,
+    timeout=POOL_WAIT_TIMEOUT,
+    pragmas=PRAGMAS,
+    check_same_thread=False,
+    # 연결은 connection_scope에서만 빌립니다. 작업 밖에서 쿼리하면 연결을 놓치지 않도록 바로 오류를 냅니다.
+    autoconnect=False,
+)
 
-db._state = PeeweeConnectionState()
\ No newline at end of file
+db._state = PeeweeConnectionState()
@@ -0,0 +1,31 @@
+import asyncio
+from typing import Callable
+
+from fastapi.routing import APIRoute
+
+from routers.advanced.endpoint.bounded_executor import BoundedExecutor
+
+from .database import POOL_MAX_CONNECTIONS, connection_scope
+
+DB_EXECUTOR_WORKERS = 8
+DB_EXECUTOR_MAX_QUEUE = 64
+DB_EXECUTOR_RETRY_AFTER = 1  # 초
+
+
+# 연결은 작업 안에서만 빌리므로 worker 수만큼의 연결이면 기다리지 않고 항상 받을 수 있습니다.
+assert POOL_MAX_CONNECTIONS >= DB_EXECUTOR_WORKERS
+db_executor = BoundedExecutor(
+    DB_EXECUTOR_WORKERS, DB_EXECUTOR_MAX_QUEUE, DB_EXECUTOR_RETRY_AFTER,
+    busy_detail="Database is busy", thread_name_prefix="peewee-db", job_scope=connection_scope,
+)
+
+
+class DBExecutorRoute(APIRoute):
+    """
+    sync 엔드포인트를 starlette threadpool 대신 db_executor에서 실행하는 route class.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = db_executor.wrap(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+import logging
+from enum import Enum
+from typing import AsyncIterator, List
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from .executor import db_executor
+
+EXPORT_BATCH_SIZE = 500
+
+logger = logging.getLogger("export")
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def encode_ndjson(rows: List[dict]) -> str:
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+def encode_csv(rows: List[dict], fields: List[str], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def next_batch(query, last_id) -> List[dict]:
+    if last_id is not None:
+        query = query.where(query.model.id > last_id)
+    return list(query.limit(EXPORT_BATCH_SIZE))
+
+
+def encode_batch(batch: List[dict], fields: List[str], export_format: ExportFormat, header: bool) -> str:
+    if export_format == ExportFormat.csv:
+        return encode_csv(batch, fields, header)
+    return encode_ndjson(batch)
+
+
+def encode_error(detail: str, export_format: ExportFormat) -> str:
+    # 헤더를 이미 보낸 뒤라 상태 코드를 바꿀 수 없으므로, 받는 쪽이 잘린 파일을 알아볼 수 있게 마지막 줄에 남깁니다.
+    if export_format == ExportFormat.csv:
+        return f"# export aborted: {detail}\n"
+    return json.dumps({"error": "export aborted", "detail": detail}) + "\n"
+
+
+async def iter_export(query, fields: List[str], export_format: ExportFormat,
+                      first_batch: List[dict]) -> AsyncIterator[str]:
+    """
+    id 순서로 EXPORT_BATCH_SIZE씩 keyset 조회해 인코딩합니다. 묶음마다 db_executor의 작업 하나이고
+    연결도 그 작업 안에서만 빌리므로, 스트림이 길어도 연결이나 커서를 붙잡고 있지 않습니다.
+    중간에 executor가 거절하거나 쿼리가 실패하면 예외 대신 오류 줄을 보내고 끝냅니다.
+    """
+    batch = first_batch
+    yield encode_batch(batch, fields, export_format, header=True)
+    while len(batch) == EXPORT_BATCH_SIZE:
+        try:
+            batch = await db_executor.run(next_batch, query, batch[-1]["id"])
+        except HTTPException as exc:
+            yield encode_error(str(exc.detail), export_format)
+            return
+        except Exception:
+            logger.exception("export failed")
+            yield encode_error("internal error", export_format)
+            return
+        if batch:
+            yield encode_batch(batch, fields, export_format, header=False)
+
+
+async def export_response(query, fields: List[str], export_format: ExportFormat, filename: str) -> StreamingResponse:
+    # 첫 묶음은 응답을 시작하기 전에 읽으므로, 여기서 거절되면 보통의 503 응답이 됩니다.
+    first_batch = await db_executor.run(next_batch, query, None)
+    return StreamingResponse(
+        iter_export(query, fields, export_format, first_batch),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
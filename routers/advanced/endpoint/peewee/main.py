@@ -1,37 +1,62 @@
-import time
-from typing import List
+import asyncio
+from typing import List, Union
 
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import HTTPException, APIRouter, Request, Response
 
+from routers.advanced.endpoint.fast_response import FastResponseRoute
 from . import crud, database, models, schemas
-from .database import db_state_default
+from .bulk import bulk_openapi, iter_bulk_chunks
+from .cache import user_cache
+from .pagination import decode_cursor, next_cursor
+from .executor import DBExecutorRoute, db_executor
+from .export import ExportFormat, export_response
 
 database.db.connect()
 database.db.create_tables([models.User, models.Item])
 database.db.close()
 
+
+class PeeweeRoute(DBExecutorRoute, FastResponseRoute):
+    pass
+
+
 router = APIRouter(
-    prefix="/peewee"
+    prefix="/peewee",
+    route_class=PeeweeRoute,
 )
 
 sleep_time = 10
 
 
-async def reset_db_state():
-    database.db._state._state.set(db_state_default.copy())
-    database.db._state.reset()
+@router.on_event("startup")
+def warm_up_pool():
+    database.db.warm_up()
+
+
+@router.on_event("shutdown")
+def close_pool():
+    database.db.close_all()
+
+
+# 연결은 요청마다가 아니라 db_executor의 작업마다 빌리고 돌려줍니다(database.connection_scope).
+
+
+@router.get("/pool/stats")
+async def read_pool_stats():
+    return database.db.pool_stats()
+
 
+@router.get("/executor/stats")
+async def read_executor_stats():
+    return db_executor.executor_stats()
 
-def get_db(db_state=Depends(reset_db_state)):
-    try:
-        database.db.connect()
-        yield
-    finally:
-        if not database.db.is_closed():
-            database.db.close()
 
+@router.get("/cache/stats")
+async def read_cache_stats():
+    return user_cache.cache_stats()
 
-@router.post("/users/", response_model=schemas.User, dependencies=[Depends(get_db)])
+
+@router.post("/users/", response_model=schemas.User)
 def create_user(user: schemas.UserCreate):
     db_user = crud.get_user_by_email(email=user.email)
     if db_user:
@@ -39,14 +64,45 @@ def create_user(user: schemas.UserCreate):
     return crud.create_user(user=user)
 
 
-@router.get("/users/", response_model=List[schemas.User], dependencies=[Depends(get_db)])
-def read_users(skip: int = 0, limit: int = 100):
-    users = crud.get_users(skip=skip, limit=limit)
+@router.post(
+    "/users/bulk",
+    response_model=List[schemas.BulkResult],
+    openapi_extra=bulk_openapi(schemas.UserCreate),
+)
+async def create_users_bulk(request: Request):
+    # 묶음마다 따로 커밋하므로, 한 묶음이 충돌해도 나머지 묶음은 계속 처리하고
+    # 409 본문에 행마다 결과(이미 커밋된 id 포함)를 담아 클라이언트가 rolled_back 행만 다시 보내게 합니다.
+    results, seen, conflicted = [], set(), False
+    async for chunk, errors in iter_bulk_chunks(request, schemas.UserCreate, crud.BULK_CHUNK_SIZE):
+        results.extend(errors)
+        if chunk:
+            try:
+                results.extend(await db_executor.run(crud.create_users_bulk, chunk, seen))
+            except crud.BulkConflict as exc:
+                results.extend(exc.rows)
+                conflicted = True
+    results.sort(key=lambda result: result.index)
+    if conflicted:
+        raise HTTPException(status_code=409, detail=[result.dict() for result in results])
+    return results
+
+
+@router.get("/users/", response_model=List[schemas.User])
+def read_users(response: Response, skip: int = 0, limit: int = 100, after: Union[str, None] = None):
+    users = crud.get_users(skip=skip, limit=limit, after=decode_cursor(after) if after else None)
+    cursor = next_cursor(users, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
     return users
 
 
+@router.get("/users/export")
+async def export_users(format: ExportFormat = ExportFormat.ndjson):
+    return await export_response(crud.export_users_query(), ["id", "email", "is_active"], format, "users")
+
+
 @router.get(
-    "/users/{user_id}", response_model=schemas.User, dependencies=[Depends(get_db)]
+    "/users/{user_id}", response_model=schemas.User
 )
 def read_user(user_id: int):
     db_user = crud.get_user(user_id=user_id)
@@ -58,24 +114,48 @@ def read_user(user_id: int):
 @router.post(
     "/users/{user_id}/items/",
     response_model=schemas.Item,
-    dependencies=[Depends(get_db)],
 )
 def create_item_for_user(user_id: int, item: schemas.ItemCreate):
     return crud.create_user_item(item=item, user_id=user_id)
 
 
-@router.get("/items/", response_model=List[schemas.Item], dependencies=[Depends(get_db)])
-def read_items(skip: int = 0, limit: int = 100):
-    items = crud.get_items(skip=skip, limit=limit)
+@router.post(
+    "/users/{user_id}/items/bulk",
+    response_model=List[schemas.BulkResult],
+    openapi_extra=bulk_openapi(schemas.ItemCreate),
+)
+async def create_items_for_user_bulk(user_id: int, request: Request):
+    if await db_executor.run(crud.get_user, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    results = []
+    async for chunk, errors in iter_bulk_chunks(request, schemas.ItemCreate, crud.BULK_CHUNK_SIZE):
+        results.extend(errors)
+        if chunk:
+            results.extend(await db_executor.run(crud.create_user_items_bulk, chunk, user_id))
+    return sorted(results, key=lambda result: result.index)
+
+
+@router.get("/items/", response_model=List[schemas.Item])
+def read_items(response: Response, skip: int = 0, limit: int = 100, after: Union[str, None] = None):
+    items = crud.get_items(skip=skip, limit=limit, after=decode_cursor(after) if after else None)
+    cursor = next_cursor(items, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
     return items
 
 
+@router.get("/items/export")
+async def export_items(format: ExportFormat = ExportFormat.ndjson):
+    return await export_response(crud.export_items_query(), ["id", "title", "description", "owner_id"], format, "items")
+
+
 @router.get(
-    "/slowusers/", response_model=List[schemas.User], dependencies=[Depends(get_db)]
+    "/slowusers/", response_model=List[schemas.User]
 )
-def read_slow_users(skip: int = 0, limit: int = 100):
+async def read_slow_users(skip: int = 0, limit: int = 100):
     global sleep_time
     sleep_time = max(0, sleep_time - 1)
-    time.sleep(sleep_time)  # Fake long processing request
-    users = crud.get_users(skip=skip, limit=limit)
+    # 느린 처리는 DB 작업 스레드와 연결을 잡지 않고 기다린 뒤, 조회만 db_executor에서 합니다.
+    await asyncio.sleep(sleep_time)  # Fake long processing request
+    users = await db_executor.run(crud.get_users, skip=skip, limit=limit)
     return users
@@ -0,0 +1,25 @@
+import base64
+import binascii
+
+from fastapi import HTTPException
+
+
+def encode_cursor(pk: int) -> str:
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor(rows: list, limit: int):
+    """
+    페이지가 가득 찼을 때만 다음 페이지의 커서를 돌려줍니다.
+    """
+    if rows and len(rows) == limit:
+        return encode_cursor(rows[-1].id)
+    return None
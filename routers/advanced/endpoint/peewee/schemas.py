@@ -46,4 +46,11 @@ class User(UserBase):
 
     class Config:
         orm_mode = True
-        getter_dict = PeeweeGetterDict
\ No newline at end of file
+        getter_dict = PeeweeGetterDict
+
+
+class BulkResult(BaseModel):
+    index: int
+    status: str
+    id: Union[int, None] = None
+    detail: Union[str, None] = None
@@ -1,9 +1,7 @@
-import os
-
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Query, Request
 from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+
+from routers.advanced.endpoint.templating import ProductionTemplates
 
 router = APIRouter(
     prefix="/templates"
@@ -11,9 +9,26 @@ router = APIRouter(
 
 
 
-templates = Jinja2Templates(directory="./routers/advanced/templates")
+templates = ProductionTemplates(directory="./routers/advanced/templates")
+
+
+@router.on_event("startup")
+def precompile_templates():
+    templates.precompile()
 
 
 @router.get("/items/{id}", response_class=HTMLResponse)
 async def read_item(request: Request, id: str):
     return templates.TemplateResponse("item.html", {"request": request, "id": id})
+
+
+@router.get("/items", response_class=HTMLResponse)
+async def list_items(request: Request, count: int = Query(default=100, ge=0, le=100000)):
+    # 큰 페이지는 전체를 문자열로 만들지 않고 렌더링하는 대로 보냅니다.
+    items = ({"id": str(i), "name": f"item {i}", "price": i * 1.5} for i in range(count))
+    return templates.StreamingTemplateResponse("items.html", {"request": request, "items": items})
+
+
+@router.get("/stats")
+async def read_template_stats():
+    return templates.template_stats()
@@ -0,0 +1,181 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Mapping, Union
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from starlette.routing import BaseRoute, NoMatchFound, Router
+from starlette.types import Receive, Scope, Send
+
+TEMPLATE_RELOAD = os.environ.get("TEMPLATE_RELOAD", "") == "1"
+TEMPLATE_CACHE_DIR = os.environ.get("TEMPLATE_CACHE_DIR")  # 없으면 jinja2가 임시 디렉터리를 씁니다.
+URL_CACHE_SIZE = 4096
+STREAM_BUFFER_SIZE = 16 * 1024
+TEMPLATE_EXTENSIONS = ("html", "htm", "xml", "txt", "jinja", "j2")
+
+
+class ProductionTemplates(Jinja2Templates):
+    """
+    운영용 Jinja2Templates.
+    템플릿 파일의 변경을 확인(stat)하지 않고, 컴파일한 bytecode를 파일로 저장해 재시작 때 다시 파싱하지 않습니다.
+    precompile()로 시작할 때 모든 템플릿을 미리 컴파일하고, url_for 결과는 (router, base_url, 이름, 인자)마다 기억합니다.
+    reload=True면 기본 Jinja2Templates처럼 매번 변경을 확인합니다(개발용).
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike], reload: bool = TEMPLATE_RELOAD,
+                 cache_dir: Union[str, None] = TEMPLATE_CACHE_DIR, url_cache_size: int = URL_CACHE_SIZE,
+                 **env_options: Any):
+        self.reload = reload
+        self.url_cache_size = url_cache_size
+        self._urls: "OrderedDict[tuple, str]" = OrderedDict()
+        self._routes: Dict[tuple, BaseRoute] = {}
+        # StreamingTemplateResponse는 threadpool에서 렌더링하므로 url_for 캐시를 여러 스레드가 같이 씁니다.
+        self._lock = threading.Lock()
+        self.url_hits = 0
+        self.url_misses = 0
+        if not reload:
+            env_options.setdefault("auto_reload", False)
+            # 미리 컴파일한 템플릿이 LRU에서 밀려나지 않도록 크기 제한을 없앱니다.
+            env_options.setdefault("cache_size", -1)
+            if cache_dir is not None:
+                os.makedirs(cache_dir, exist_ok=True)
+            env_options.setdefault("bytecode_cache", jinja2.FileSystemBytecodeCache(cache_dir))
+        super().__init__(directory, **env_options)
+
+    def _create_env(self, directory, **env_options: Any) -> jinja2.Environment:
+        env = super()._create_env(directory, **env_options)
+        if not self.reload:
+            @jinja2.pass_context
+            def url_for(context: dict, name: str, **path_params: Any) -> str:
+                return self.cached_url_for(context["request"], name, **path_params)
+
+            env.globals["url_for"] = url_for
+        return env
+
+    def cached_url_for(self, request: Request, name: str, **path_params: Any) -> str:
+        router = request.scope["router"]
+        base_url = str(request.base_url)
+        # Router는 __eq__를 정의해 hash할 수 없으므로 id로 구분합니다.
+        try:
+            key = (id(router), base_url, name, frozenset(path_params.items()))
+            hash(key)
+        except TypeError:  # hash할 수 없는 인자
+            return request.url_for(name, **path_params)
+        with self._lock:
+            url = self._urls.get(key)
+            if url is not None:
+                self._urls.move_to_end(key)
+                self.url_hits += 1
+                return url
+            self.url_misses += 1
+        # URL은 락 밖에서 만듭니다. 두 스레드가 같은 URL을 만들어도 결과가 같으므로 나중 것이 덮어씁니다.
+        url = self._build_url(router, base_url, name, path_params)
+        with self._lock:
+            self._urls[key] = url
+            while len(self._urls) > self.url_cache_size:
+                self._urls.popitem(last=False)
+        return url
+
+    def _build_url(self, router: Router, base_url: str, name: str, path_params: dict) -> str:
+        # 이름과 인자 이름으로 찾은 route를 기억해 두고, 다음부터는 route 목록을 훑지 않고 그 route로 바로 path를 만듭니다.
+        route_key = (id(router), name, frozenset(path_params))
+        with self._lock:
+            route = self._routes.get(route_key)
+        if route is None:
+            route = self._resolve_route(router, name, path_params)
+            with self._lock:
+                self._routes[route_key] = route
+        url_path = route.url_path_for(name, **path_params)
+        if url_path.protocol != "http":
+            return str(url_path.make_absolute_url(base_url=base_url))
+        # base_url에는 query가 없으므로 URL을 다시 파싱하지 않고 문자열로 붙입니다.
+        return base_url.rstrip("/") + url_path
+
+    @staticmethod
+    def _resolve_route(router: Router, name: str, path_params: dict) -> BaseRoute:
+        for route in router.routes:
+            try:
+                route.url_path_for(name, **path_params)
+            except NoMatchFound:
+                continue
+            return route
+        raise NoMatchFound(name, path_params)
+
+    def precompile(self) -> List[str]:
+        """
+        모든 템플릿을 컴파일해 메모리와 bytecode cache에 올립니다. 문법 오류는 첫 요청이 아니라 시작할 때 드러납니다.
+        """
+        names = self.env.list_templates(extensions=TEMPLATE_EXTENSIONS)
+        for name in names:
+            self.env.get_template(name)
+        return names
+
+    def StreamingTemplateResponse(
+        self,
+        name: str,
+        context: dict,
+        status_code: int = 200,
+        headers: Union[Mapping[str, str], None] = None,
+        media_type: Union[str, None] = None,
+        background: Union[BackgroundTask, None] = None,
+    ) -> "StreamingTemplateResponse":
+        if "request" not in context:
+            raise ValueError('context must include a "request" key')
+        return StreamingTemplateResponse(
+            self.get_template(name),
+            context,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            background=background,
+        )
+
+    def template_stats(self):
+        with self._lock:
+            return {
+                "reload": self.reload,
+                "templates": len(self.env.cache) if self.env.cache is not None else 0,
+                "url_cache_size": len(self._urls),
+                "routes": len(self._routes),
+                "url_hits": self.url_hits,
+                "url_misses": self.url_misses,
+            }
+
+
+def buffered(chunks: Iterator[str], size: int = STREAM_BUFFER_SIZE) -> Iterator[bytes]:
+    # generate()는 템플릿 조각마다 짧은 문자열을 내므로, 모아서 보내 send(와 스레드 전환) 횟수를 줄입니다.
+    buffer, buffered_size = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered_size += len(chunk)
+        if buffered_size >= size:
+            yield "".join(buffer).encode()
+            buffer, buffered_size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+class StreamingTemplateResponse(StreamingResponse):
+    """
+    템플릿 전체를 문자열로 만들지 않고 template.generate()로 렌더링하는 대로 보내는 응답.
+    큰 페이지에서 첫 byte가 빨리 나가고 메모리에 페이지 전체를 들고 있지 않습니다.
+    """
+
+    media_type = "text/html"
+
+    def __init__(self, template: jinja2.Template, context: dict, status_code: int = 200,
+                 headers: Union[Mapping[str, str], None] = None, media_type: Union[str, None] = None,
+                 background: Union[BackgroundTask, None] = None):
+        self.template = template
+        self.context = context
+        super().__init__(buffered(template.generate(context)), status_code, headers, media_type, background)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # TestClient가 response.template/context를 볼 수 있도록 _TemplateResponse와 같은 확장 메시지를 보냅니다.
+        if "http.response.template" in scope.get("extensions", {}):
+            await send({"type": "http.response.template", "template": self.template, "context": self.context})
+        await super().__call__(scope, receive, send)
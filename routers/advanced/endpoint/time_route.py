@@ -1,22 +1,156 @@
+import asyncio
+import functools
+import json
+import logging
+import random
 import time
-from typing import Callable
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Union
 
-from fastapi import APIRouter, Request, Response
+from fastapi import APIRouter, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException
+
+TIMING_BUFFER_SIZE = 4096
+TIMING_SAMPLE_RATE = 1.0
+TIMING_FLUSH_INTERVAL = 1.0  # 초
+
+logger = logging.getLogger("timed_route")
+timing_phases: ContextVar[Union[Dict[str, float], None]] = ContextVar("timing_phases", default=None)
+
+
+@dataclass
+class TimingRecord:
+    route: str
+    method: str
+    status_code: int
+    duration: float
+    dependencies: float
+    handler: float
+    serialization: float
+
+
+class TimingBuffer:
+    """
+    timing 기록을 담는 고정 크기 ring buffer.
+    요청 처리 중에는 append만 하고, 로그 출력은 백그라운드 task가 모아서 처리합니다.
+    가득 차면 오래된 기록부터 버립니다.
+    """
+
+    def __init__(self, size: int = TIMING_BUFFER_SIZE, sample_rate: float = TIMING_SAMPLE_RATE,
+                 sink: Callable[[TimingRecord], None] = None):
+        self.records = deque(maxlen=size)
+        self.sample_rate = sample_rate
+        self.sink = sink or (lambda record: logger.info(json.dumps(asdict(record))))
+        self.dropped = 0
+        self._task = None
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def push(self, record: TimingRecord):
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append(record)
+
+    def drain(self) -> List[TimingRecord]:
+        records = []
+        while self.records:
+            records.append(self.records.popleft())
+        return records
+
+    def flush(self):
+        for record in self.drain():
+            self.sink(record)
+
+    async def run(self, interval: float = TIMING_FLUSH_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            if self.records:
+                await run_in_threadpool(self.flush)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.flush()
+
+
+timing_buffer = TimingBuffer()
 
 
 class TimedRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, self.wrap_endpoint(endpoint), **kwargs)
+
+    @staticmethod
+    def wrap_endpoint(endpoint: Callable) -> Callable:
+        # include_router가 route를 다시 만들 때 두번 감싸지 않도록 원래 함수를 꺼내 씁니다.
+        endpoint = getattr(endpoint, "timed_endpoint", endpoint)
+        is_coroutine = asyncio.iscoroutinefunction(endpoint)
+
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            phases = timing_phases.get()
+            if phases is not None:
+                phases["handler_start"] = time.perf_counter()
+            try:
+                if is_coroutine:
+                    return await endpoint(*args, **kwargs)
+                return await run_in_threadpool(endpoint, *args, **kwargs)
+            finally:
+                if phases is not None:
+                    phases["handler_end"] = time.perf_counter()
+
+        timed_endpoint.timed_endpoint = endpoint
+        return timed_endpoint
+
     def get_route_handler(self) -> Callable:
         original_route_handler = super().get_route_handler()
 
         async def custom_route_handler(request: Request) -> Response:
-            before = time.time()
-            response: Response = await original_route_handler(request)
-            duration = time.time() - before
-            response.headers["X-Response-Time"] = str(duration)
-            print(f"route duration: {duration}")
-            print(f"route response: {response}")
-            print(f"route response headers: {response.headers}")
+            before = time.perf_counter()
+            if not timing_buffer.sampled():
+                response: Response = await original_route_handler(request)
+                response.headers["X-Response-Time"] = str(time.perf_counter() - before)
+                return response
+
+            phases = {}
+            token = timing_phases.set(phases)
+            # 예외로 끝난 요청도 기록합니다. 상태 코드는 예외에 맞춰 정합니다.
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            try:
+                response: Response = await original_route_handler(request)
+                status_code = response.status_code
+            except HTTPException as exc:
+                status_code = exc.status_code
+                raise
+            except RequestValidationError:
+                status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+                raise
+            finally:
+                timing_phases.reset(token)
+                after = time.perf_counter()
+                handler_start = phases.get("handler_start", after)
+                handler_end = phases.get("handler_end", after)
+                timing_buffer.push(TimingRecord(
+                    route=self.path,
+                    method=request.method,
+                    status_code=status_code,
+                    duration=after - before,
+                    dependencies=handler_start - before,
+                    handler=handler_end - handler_start,
+                    serialization=after - handler_end,
+                ))
+            response.headers["X-Response-Time"] = str(after - before)
             return response
 
         return custom_route_handler
@@ -27,6 +161,16 @@ router = APIRouter(
 )
 
 
+@router.on_event("startup")
+async def start_timing_buffer():
+    timing_buffer.start()
+
+
+@router.on_event("shutdown")
+async def stop_timing_buffer():
+    await timing_buffer.stop()
+
+
 @router.get("/")
 async def not_timed():
     return {"message": "Not timed"}
@@ -38,4 +182,3 @@ router.route_class = TimedRoute
 @router.get("/timed")
 async def timed():
     return {"message": "It's the time of my life"}
-
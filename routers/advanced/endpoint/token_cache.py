@@ -0,0 +1,92 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Set, Union
+
+TOKEN_CACHE_SIZE = 10000
+REVOKED_SWEEP_SIZE = 64
+
+
+class TokenCache:
+    """
+    검증이 끝난 access token의 결과(claims, 사용자)를 토큰의 exp까지 보관합니다.
+    키는 토큰 원문이 아닌 sha256 해시를 씁니다.
+    revoke로 만료 전이라도 토큰을 무효화할 수 있고, 무효화 목록은 토큰의 exp가 지나면 정리합니다.
+    revoke_user는 사용자 정보가 바뀌었을 때(비활성화 등) 그 사용자의 캐시 항목을 지워 다음 요청에서 다시 확인하게 합니다.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self._by_user: Dict[str, Set[bytes]] = {}
+        self._sweep_at = REVOKED_SWEEP_SIZE
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Union[Any, None]:
+        key = self.key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.time():
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, token: str, expires_at: float, username: str, value: Any):
+        key = self.key(token)
+        self._drop(key)
+        self._entries[key] = (expires_at, username, value)
+        self._by_user.setdefault(username, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry[1]]
+
+    def is_revoked(self, token: str) -> bool:
+        if not self._revoked:
+            return False
+        expires_at = self._revoked.get(self.key(token))
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._revoked[self.key(token)]
+            return False
+        return True
+
+    def revoke(self, token: str, expires_at: float):
+        key = self.key(token)
+        self._drop(key)
+        self._revoked[key] = expires_at
+        # 조회되지 않는 토큰도 exp가 지나면 지웁니다. 목록이 두 배로 커질 때만 훑으므로 revoke 한 번의 평균 비용은 상수입니다.
+        if len(self._revoked) >= self._sweep_at:
+            now = time.time()
+            for expired in [key for key, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[expired]
+            self._sweep_at = max(REVOKED_SWEEP_SIZE, len(self._revoked) * 2)
+
+    def revoke_user(self, username: str):
+        for key in list(self._by_user.get(username, ())):
+            self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_user.clear()
@@ -0,0 +1,436 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, BinaryIO, Dict, List, Set, Tuple, Union
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart 0.0.13 이전
+    from multipart.multipart import MultipartParser, parse_options_header
+
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "fastapi-tutorial-uploads"))
+UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+UPLOAD_MAX_FIELD_SIZE = 64 * 1024
+UPLOAD_WRITE_BUFFER = 1024 * 1024  # 이만큼 모아서 스레드 작업 한번으로 씁니다.
+UPLOAD_READ_CHUNK = 1024 * 1024
+
+
+@dataclass
+class UploadedFile:
+    field_name: str
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    path: str
+
+
+def upload_openapi(*file_fields: str) -> dict:
+    """
+    request body를 직접 읽는 경로도 문서에서 파일을 올려볼 수 있도록 multipart 스키마를 넣어 줍니다.
+    """
+    return {
+        "requestBody": {
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {name: {"type": "string", "format": "binary"} for name in file_fields},
+                    }
+                }
+            },
+            "required": True,
+        }
+    }
+
+
+def _write_chunk(file: BinaryIO, hasher, data: bytes):
+    # hashlib과 파일 쓰기 모두 GIL을 놓으므로 한 스레드 작업으로 묶어 처리합니다.
+    hasher.update(data)
+    file.write(data)
+
+
+def _discard(files: List[Tuple[BinaryIO, str]]):
+    for file, path in files:
+        file.close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+async def temporary_upload_dir() -> AsyncIterator[str]:
+    """
+    요청마다 UPLOAD_DIR 아래에 임시 디렉터리를 만들어 주는 dependency.
+    응답을 보낸 뒤(실패한 요청도) 디렉터리째 지우므로, 남겨야 하는 파일은 엔드포인트에서 다른 곳으로 옮깁니다.
+    """
+    await run_in_threadpool(os.makedirs, UPLOAD_DIR, exist_ok=True)
+    directory = await run_in_threadpool(tempfile.mkdtemp, dir=UPLOAD_DIR)
+    try:
+        yield directory
+    finally:
+        await run_in_threadpool(shutil.rmtree, directory, True)
+
+
+async def stream_multipart(request: Request, upload_dir: str = UPLOAD_DIR,
+                           max_size: int = UPLOAD_MAX_SIZE) -> Tuple[Dict[str, str], List[UploadedFile]]:
+    """
+    multipart 본문을 받는 대로 파싱해서 파일 part는 upload_dir에 바로 씁니다.
+    본문 전체나 파일 하나를 메모리에 모으지 않고, 전체 크기가 max_size를 넘으면 413으로 끊고 쓰던 파일을 지웁니다.
+    """
+    content_type, params = parse_options_header(request.headers.get("Content-Type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Expected multipart/form-data")
+
+    messages: List[Tuple[str, bytes]] = []
+    callbacks = {
+        "on_part_begin": lambda: messages.append(("part_begin", b"")),
+        "on_part_data": lambda data, start, end: messages.append(("part_data", data[start:end])),
+        "on_part_end": lambda: messages.append(("part_end", b"")),
+        "on_header_field": lambda data, start, end: messages.append(("header_field", data[start:end])),
+        "on_header_value": lambda data, start, end: messages.append(("header_value", data[start:end])),
+        "on_header_end": lambda: messages.append(("header_end", b"")),
+        "on_headers_finished": lambda: messages.append(("headers_finished", b"")),
+        "on_end": lambda: messages.append(("end", b"")),
+    }
+    parser = MultipartParser(params[b"boundary"], callbacks)
+    await run_in_threadpool(os.makedirs, upload_dir, exist_ok=True)
+
+    fields: Dict[str, str] = {}
+    uploaded: List[UploadedFile] = []
+    open_files: List[Tuple[BinaryIO, str]] = []
+    header_field = header_value = b""
+    headers: Dict[bytes, bytes] = {}
+    field_name = ""
+    field_data = b""
+    current: Union[UploadedFile, None] = None
+    file: Union[BinaryIO, None] = None
+    hasher = None
+    received = 0
+    finished = False
+    pending: List[bytes] = []
+    pending_size = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_size:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Upload is too large")
+            try:
+                parser.write(chunk)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid multipart body")
+            batch, messages[:] = list(messages), []
+            for kind, data in batch:
+                if kind == "part_begin":
+                    headers, field_data, current = {}, b"", None
+                elif kind == "header_field":
+                    header_field += data
+                elif kind == "header_value":
+                    header_value += data
+                elif kind == "header_end":
+                    headers[header_field.lower()] = header_value
+                    header_field = header_value = b""
+                elif kind == "headers_finished":
+                    _, options = parse_options_header(headers.get(b"content-disposition", b""))
+                    if b"name" not in options:
+                        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                            detail='Content-Disposition "name" is required')
+                    field_name = options[b"name"].decode()
+                    if b"filename" in options:
+                        path = os.path.join(upload_dir, uuid.uuid4().hex)
+                        file = await run_in_threadpool(open, path, "wb")
+                        open_files.append((file, path))
+                        hasher = hashlib.sha256()
+                        current = UploadedFile(
+                            field_name=field_name,
+                            filename=os.path.basename(options[b"filename"].decode()),
+                            content_type=headers.get(b"content-type", b"application/octet-stream").decode(),
+                            size=0,
+                            sha256="",
+                            path=path,
+                        )
+                elif kind == "part_data":
+                    if current is None:
+                        field_data += data
+                        if len(field_data) > UPLOAD_MAX_FIELD_SIZE:
+                            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                                detail=f"Field {field_name} is too large")
+                    else:
+                        current.size += len(data)
+                        pending.append(data)
+                        pending_size += len(data)
+                elif kind == "part_end":
+                    if current is None:
+                        fields[field_name] = field_data.decode(errors="replace")
+                        continue
+                    if pending:
+                        await run_in_threadpool(_write_chunk, file, hasher, b"".join(pending))
+                        pending, pending_size = [], 0
+                    await run_in_threadpool(file.close)
+                    current.sha256 = hasher.hexdigest()
+                    uploaded.append(current)
+                    current = None
+                elif kind == "end":
+                    finished = True
+            if pending_size >= UPLOAD_WRITE_BUFFER:
+                await run_in_threadpool(_write_chunk, file, hasher, b"".join(pending))
+                pending, pending_size = [], 0
+        if not finished:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incomplete multipart body")
+    except BaseException:
+        # 취소된 경우에도 정리되도록 await 없이 지웁니다.
+        _discard(open_files)
+        raise
+    return fields, uploaded
+
+
+RESUMABLE_DIR = os.path.join(UPLOAD_DIR, "sessions")
+RESUMABLE_MAX_SIZE = 64 * 1024 * 1024 * 1024
+PART_SIZE_DEFAULT = 8 * 1024 * 1024
+PART_SIZE_MIN = 64 * 1024
+PART_SIZE_MAX = 256 * 1024 * 1024
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # 초, 만든 뒤 이 시간이 지난 세션은 끝나지 않았어도 지웁니다.
+UPLOAD_SESSION_SWEEP_INTERVAL = 60 * 60  # 초
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int = Field(gt=0, le=RESUMABLE_MAX_SIZE)
+    part_size: int = Field(PART_SIZE_DEFAULT, ge=PART_SIZE_MIN, le=PART_SIZE_MAX)
+
+
+@dataclass
+class UploadSession:
+    id: str
+    filename: str
+    size: int
+    part_size: int
+    created_at: float = 0.0
+    completed: bool = False
+
+    @property
+    def part_count(self) -> int:
+        return -(-self.size // self.part_size)
+
+    def part_range(self, part: int) -> Tuple[int, int]:
+        offset = part * self.part_size
+        return offset, min(self.part_size, self.size - offset)
+
+
+class UploadSessionStore:
+    """
+    이어 올리기가 가능한 업로드 세션. 세션마다 디렉터리 하나를 쓰고 상태를 모두 파일로 남기므로
+    연결이 끊기거나 프로세스가 재시작되어도 받지 못한 part부터 다시 보내면 됩니다.
+
+    - data: 전체 크기로 미리 잡아 둔 sparse 파일. part는 각자의 offset에 pwrite로 쓰므로 병렬로 받을 수 있습니다.
+    - parts/<n>: 데이터를 fsync한 뒤에 쓰는 part별 sha256. 이 파일이 있는 part만 받은 것으로 봅니다.
+    - meta.json: 세션 정보와 완료 여부. 임시 파일에 쓴 뒤 rename하므로 읽는 쪽이 반쯤 쓴 파일을 보지 않습니다.
+    - complete 때는 data 파일을 rename만 하므로 다시 복사하지 않습니다.
+
+    같은 part를 동시에 올리거나, part를 받는 중에 complete하거나, 두번 complete하면 409로 거절합니다
+    (진행 중인 작업은 이 프로세스 안에서만 추적합니다).
+    만든 뒤 ttl이 지난 세션은 create 때 주기적으로 지웁니다.
+    """
+
+    def __init__(self, root: str = RESUMABLE_DIR, upload_dir: str = UPLOAD_DIR, ttl: float = UPLOAD_SESSION_TTL,
+                 sweep_interval: float = UPLOAD_SESSION_SWEEP_INTERVAL):
+        self.root = root
+        self.upload_dir = upload_dir
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._writing: Dict[str, Set[int]] = {}
+        self._completing: Set[str] = set()
+        self._next_sweep = 0.0
+
+    def _directory(self, upload_id: str) -> str:
+        return os.path.join(self.root, upload_id)
+
+    async def create(self, request: UploadSessionCreate) -> UploadSession:
+        now = time.time()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            await self.sweep(now)
+        session = UploadSession(uuid.uuid4().hex, os.path.basename(request.filename), request.size,
+                                request.part_size, created_at=now)
+        await run_in_threadpool(self._create, session)
+        return session
+
+    def _create(self, session: UploadSession):
+        directory = self._directory(session.id)
+        os.makedirs(os.path.join(directory, "parts"))
+        with open(os.path.join(directory, "data"), "wb") as data:
+            data.truncate(session.size)
+        _write_text(os.path.join(directory, "meta.json"), json.dumps(asdict(session)))
+
+    async def get(self, upload_id: str) -> UploadSession:
+        try:
+            upload_id = uuid.UUID(upload_id).hex
+            meta = await run_in_threadpool(_read_json, os.path.join(self._directory(upload_id), "meta.json"))
+        except (ValueError, FileNotFoundError):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+        session = UploadSession(**meta)
+        if session.created_at + self.ttl <= time.time():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+        return session
+
+    async def received_parts(self, session: UploadSession) -> Dict[int, str]:
+        return await run_in_threadpool(self._received_parts, session)
+
+    def _received_parts(self, session: UploadSession) -> Dict[int, str]:
+        parts_dir = os.path.join(self._directory(session.id), "parts")
+        received = {}
+        for name in os.listdir(parts_dir):
+            if name.isdigit():
+                with open(os.path.join(parts_dir, name)) as part:
+                    received[int(name)] = part.read()
+        return received
+
+    async def write_part(self, session: UploadSession, part: int, request: Request,
+                         expected_sha256: Union[str, None] = None) -> Tuple[int, str]:
+        if not 0 <= part < session.part_count:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Part must be in 0..{session.part_count - 1}")
+        if session.completed or session.id in self._completing:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already complete")
+        writing = self._writing.setdefault(session.id, set())
+        if part in writing:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Part {part} is already being uploaded")
+        writing.add(part)
+        try:
+            return await self._write_part(session, part, request, expected_sha256)
+        finally:
+            writing.discard(part)
+            if not writing:
+                self._writing.pop(session.id, None)
+
+    async def _write_part(self, session: UploadSession, part: int, request: Request,
+                          expected_sha256: Union[str, None]) -> Tuple[int, str]:
+        offset, length = session.part_range(part)
+        directory = self._directory(session.id)
+        try:
+            fd = await run_in_threadpool(os.open, os.path.join(directory, "data"), os.O_WRONLY)
+        except FileNotFoundError:
+            # get()과 write_part() 사이에 complete되었거나 만료되어 지워진 세션
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already complete")
+        hasher = hashlib.sha256()
+        written = 0
+        pending: List[bytes] = []
+        pending_size = 0
+        try:
+            async for chunk in request.stream():
+                if written + pending_size + len(chunk) > length:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                        detail=f"Part {part} must be {length} bytes")
+                pending.append(chunk)
+                pending_size += len(chunk)
+                if pending_size >= UPLOAD_WRITE_BUFFER:
+                    await run_in_threadpool(_pwrite_chunk, fd, hasher, b"".join(pending), offset + written)
+                    written += pending_size
+                    pending, pending_size = [], 0
+            if pending:
+                await run_in_threadpool(_pwrite_chunk, fd, hasher, b"".join(pending), offset + written)
+                written += pending_size
+            if written != length:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail=f"Part {part} must be {length} bytes")
+            sha256 = hasher.hexdigest()
+            if expected_sha256 is not None and expected_sha256.lower() != sha256:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Part {part} checksum mismatch")
+            await run_in_threadpool(os.fsync, fd)
+        finally:
+            await run_in_threadpool(os.close, fd)
+        await run_in_threadpool(_write_text, os.path.join(directory, "parts", str(part)), sha256)
+        return written, sha256
+
+    async def complete(self, session: UploadSession) -> Tuple[str, str]:
+        """
+        모든 part를 받았으면 data 파일을 최종 위치로 옮기고, part sha256들을 이어 붙인 값의 sha256을 돌려줍니다.
+        세션 디렉터리는 완료 표시만 남겨 두었다가 ttl이 지나면 지웁니다.
+        """
+        if session.completed or session.id in self._completing:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already complete")
+        if self._writing.get(session.id):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail={"uploading_parts": sorted(self._writing[session.id])})
+        self._completing.add(session.id)
+        try:
+            received = await self.received_parts(session)
+            missing = [part for part in range(session.part_count) if part not in received]
+            if missing:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail={"missing_parts": missing})
+            digest = hashlib.sha256("".join(received[part] for part in range(session.part_count)).encode()).hexdigest()
+            path = os.path.join(self.upload_dir, f"{session.id}-{session.filename}")
+            try:
+                await run_in_threadpool(self._complete, session, path)
+            except FileNotFoundError:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already complete")
+        finally:
+            self._completing.discard(session.id)
+        return path, f"{digest}-{session.part_count}"
+
+    def _complete(self, session: UploadSession, path: str):
+        directory = self._directory(session.id)
+        os.replace(os.path.join(directory, "data"), path)
+        session.completed = True
+        _write_text(os.path.join(directory, "meta.json"), json.dumps(asdict(session)))
+
+    async def sweep(self, now: Union[float, None] = None) -> List[str]:
+        """
+        만든 뒤 ttl이 지난 세션 디렉터리를 지웁니다. 이 프로세스에서 진행 중인 세션은 건너뜁니다.
+        """
+        active = set(self._writing) | self._completing
+        return await run_in_threadpool(self._sweep, time.time() if now is None else now, active)
+
+    def _sweep(self, now: float, active: Set[str]) -> List[str]:
+        removed = []
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return removed
+        for name in names:
+            directory = self._directory(name)
+            if name in active:
+                continue
+            try:
+                created_at = _read_json(os.path.join(directory, "meta.json")).get("created_at", 0.0)
+            except (OSError, ValueError):
+                # meta.json을 쓰기 전에 멈춘 세션은 디렉터리 시각으로 판단합니다.
+                try:
+                    created_at = os.path.getmtime(directory)
+                except OSError:
+                    continue
+            if created_at + self.ttl <= now:
+                shutil.rmtree(directory, ignore_errors=True)
+                removed.append(name)
+        return removed
+
+
+def _pwrite_chunk(fd: int, hasher, data: bytes, offset: int):
+    hasher.update(data)
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _read_json(path: str):
+    with open(path) as file:
+        return json.load(file)
+
+
+def _write_text(path: str, text: str):
+    with open(f"{path}.tmp", "w") as file:
+        file.write(text)
+    os.replace(f"{path}.tmp", path)
+
+
+upload_sessions = UploadSessionStore()
@@ -0,0 +1,180 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, List, Mapping, Union
+
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 30  # 초
+
+
+@dataclass(frozen=True)
+class UserRecord:
+    """
+    인증 경로에서 쓰는 사용자 정보. 요청마다 pydantic 모델을 만들지 않도록 한번 만든 값을 캐시해 같이 씁니다.
+    """
+
+    username: str
+    email: Union[str, None]
+    full_name: Union[str, None]
+    disabled: Union[bool, None]
+    hashed_password: str
+
+
+USER_FIELDS = tuple(field.name for field in fields(UserRecord))
+
+
+class UserStore:
+    """
+    username으로 사용자를 찾는 저장소 인터페이스. 하위 클래스는 fetch_many만 구현합니다.
+    같은 이벤트 루프 tick에 들어온 조회는 fetch_many 한번으로 묶고,
+    이미 조회 중인 username은 새로 조회하지 않고 그 결과를 같이 기다립니다.
+    찾은 사용자는 ttl 동안 캐시하고, 없는 사용자는 캐시하지 않습니다.
+    사용자를 바꾸는 쪽은 changed(username)를 불러 이 캐시와 subscribe한 캐시(토큰 캐시 등)를 비웁니다.
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._records: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._batch: List[str] = []
+        self._listeners: List[Callable[[str], None]] = []
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.batches = 0
+
+    async def fetch_many(self, usernames: List[str]) -> Mapping[str, UserRecord]:
+        raise NotImplementedError
+
+    async def get(self, username: str) -> Union[UserRecord, None]:
+        entry = self._records.get(username)
+        if entry is not None:
+            expires_at, record = entry
+            if expires_at > time.monotonic():
+                self._records.move_to_end(username)
+                self.hits += 1
+                return record
+            del self._records[username]
+        self.misses += 1
+        future = self._pending.get(username)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[username] = loop.create_future()
+            self._batch.append(username)
+            if len(self._batch) == 1:
+                loop.call_soon(self._dispatch)
+        else:
+            self.coalesced += 1
+        # 기다리던 요청 하나가 취소되어도 같은 결과를 기다리는 다른 요청에는 영향이 없도록 합니다.
+        return await asyncio.shield(future)
+
+    def _dispatch(self):
+        batch, self._batch = self._batch, []
+        self.batches += 1
+        asyncio.get_running_loop().create_task(self._load(batch))
+
+    async def _load(self, usernames: List[str]):
+        try:
+            records = await self.fetch_many(usernames)
+        except Exception as exc:
+            for username in usernames:
+                future = self._pending.pop(username)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        expires_at = time.monotonic() + self.ttl
+        for username in usernames:
+            record = records.get(username)
+            if record is not None:
+                self._records[username] = (expires_at, record)
+                self._records.move_to_end(username)
+            future = self._pending.pop(username)
+            if not future.done():
+                future.set_result(record)
+        while len(self._records) > self.maxsize:
+            self._records.popitem(last=False)
+
+    def invalidate(self, username: str):
+        self._records.pop(username, None)
+
+    def subscribe(self, listener: Callable[[str], None]):
+        self._listeners.append(listener)
+
+    def changed(self, username: str):
+        self.invalidate(username)
+        for listener in self._listeners:
+            listener(username)
+
+    def store_stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "cached": len(self._records),
+        }
+
+
+class DictUserStore(UserStore):
+    def __init__(self, users: Mapping[str, dict], **kwargs):
+        super().__init__(**kwargs)
+        self.users = users
+
+    def update(self, username: str, **changes):
+        self.users[username].update(changes)
+        self.changed(username)
+
+    async def fetch_many(self, usernames):
+        return {
+            username: UserRecord(**{field: self.users[username].get(field) for field in USER_FIELDS})
+            for username in usernames
+            if username in self.users
+        }
+
+
+class PeeweeUserStore(UserStore):
+    """
+    peewee 예제의 User 테이블을 쓰는 저장소. 테이블에 username이 없으므로 email을 username으로 씁니다.
+    조회는 db_executor에서 IN 쿼리 한번으로 처리합니다.
+    peewee 예제의 /users/는 bcrypt가 아닌 가짜 해시를 저장하므로, bcrypt 해시가 없는 사용자는 없는 것으로 봅니다.
+    User 테이블을 바꾸는 코드는 changed(email)를 불러야 합니다.
+    """
+
+    def __init__(self, **kwargs):
+        # 이 저장소를 쓸 때만 peewee 예제(연결 풀과 SQLite 파일)를 불러옵니다.
+        from passlib.hash import bcrypt
+
+        from routers.advanced.endpoint.peewee import models
+        from routers.advanced.endpoint.peewee.executor import db_executor
+
+        super().__init__(**kwargs)
+        self.model = models.User
+        self.executor = db_executor
+        self.is_password_hash = bcrypt.identify
+
+    async def fetch_many(self, usernames):
+        return await self.executor.run(self._select, usernames)
+
+    def _select(self, usernames: List[str]) -> Dict[str, UserRecord]:
+        # 연결은 db_executor가 작업마다 빌리고 돌려줍니다.
+        rows = self.model.select().where(self.model.email.in_(usernames)).dicts()
+        return {
+            row["email"]: UserRecord(
+                username=row["email"],
+                email=row["email"],
+                full_name=None,
+                disabled=not row["is_active"],
+                hashed_password=row["hashed_password"],
+            )
+            for row in rows
+            if self.is_password_hash(row["hashed_password"])
+        }
+
+
+def user_store_from_env(users: Mapping[str, dict]) -> UserStore:
+    if os.environ.get("USER_STORE") == "sqlite":
+        return PeeweeUserStore()
+    return DictUserStore(users)
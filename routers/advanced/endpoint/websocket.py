@@ -1,8 +1,18 @@
-from typing import List
+import asyncio
+import json
+from enum import Enum
+from typing import Dict, Iterable, List, Set, Union
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import HTMLResponse
 
+from routers.advanced.endpoint.backplane import Backplane, InProcessBackplane, backplane_from_env
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 router = APIRouter()
 
 html = """
@@ -22,14 +32,19 @@ html = """
         </ul>
         <script>
             var client_id = Date.now()
+            var coalesce_ms = 20
             document.querySelector("#ws-id").textContent = client_id;
-            var ws = new WebSocket(`ws://localhost:8000/advanced/ws/${client_id}`);
+            var ws = new WebSocket(`ws://localhost:8000/advanced/ws/${client_id}?coalesce_ms=${coalesce_ms}`);
             ws.onmessage = function(event) {
+                // coalesce_ms를 주면 frame 하나가 메시지들의 JSON 배열입니다.
+                var texts = coalesce_ms ? JSON.parse(event.data) : [event.data]
                 var messages = document.getElementById('messages')
-                var message = document.createElement('li')
-                var content = document.createTextNode(event.data)
-                message.appendChild(content)
-                messages.appendChild(message)
+                texts.forEach(function(text) {
+                    var message = document.createElement('li')
+                    var content = document.createTextNode(text)
+                    message.appendChild(content)
+                    messages.appendChild(message)
+                })
             };
             function sendMessage(event) {
                 var input = document.getElementById("messageText")
@@ -43,26 +58,185 @@ html = """
 """
 
 
+SEND_QUEUE_SIZE = 256
+MAX_COALESCE_MS = 100
+# permessage-deflate는 ASGI 서버가 협상합니다. uvicorn은 ws_per_message_deflate=True(기본값)로 켭니다.
+
+
+class SlowConsumerPolicy(str, Enum):
+    drop_oldest = "drop_oldest"
+    disconnect = "disconnect"
+
+
+class Framing(str, Enum):
+    text = "text"
+    msgpack = "msgpack"
+
+
+def encode_frame(message: str, framing: Framing = Framing.text) -> dict:
+    """
+    ASGI websocket.send 메시지를 한번만 만들어 모든 수신자가 같은 객체를 공유합니다.
+    """
+    if framing == Framing.msgpack:
+        if msgpack is None:
+            raise RuntimeError("msgpack framing requires the msgpack package")
+        return {"type": "websocket.send", "bytes": msgpack.packb(message)}
+    return {"type": "websocket.send", "text": message}
+
+
+def merge_frames(frames: List[dict]) -> dict:
+    """
+    coalescing을 켠 연결에 보낼 frame을 만듭니다. text는 메시지들의 JSON 배열(하나여도 배열)로 보내
+    메시지 안의 줄바꿈과 상관없이 나눌 수 있고, msgpack은 이미 인코딩된 bytes를 이어 붙여 msgpack stream으로 보냅니다.
+    """
+    if "bytes" in frames[0]:
+        if len(frames) == 1:
+            return frames[0]
+        return {"type": "websocket.send", "bytes": b"".join(frame["bytes"] for frame in frames)}
+    return {"type": "websocket.send", "text": json.dumps([frame["text"] for frame in frames])}
+
+
+class Connection:
+    """
+    websocket 하나와 그 전송 큐, 큐를 비우는 writer task.
+    broadcast는 큐에 넣기만 하므로 느린 클라이언트가 다른 클라이언트의 전송을 막지 않습니다.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int, framing: Framing = Framing.text,
+                 coalesce_window: float = 0):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.framing = framing
+        self.coalesce_window = coalesce_window
+        self.topics: Set[str] = set()
+        self.dropped = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.writer: asyncio.Task = None
+
+    async def write_loop(self, on_error):
+        try:
+            while True:
+                frame = await self.queue.get()
+                if self.coalesce_window:
+                    # 첫 메시지 이후 coalesce_window 동안 쌓인 메시지를 한 frame으로 보냅니다.
+                    await asyncio.sleep(self.coalesce_window)
+                    frames = [frame]
+                    while not self.queue.empty():
+                        frames.append(self.queue.get_nowait())
+                    frame = merge_frames(frames)
+                await self.websocket.send(frame)
+                self.frames_sent += 1
+                self.bytes_sent += len(frame.get("bytes") or frame["text"].encode())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            on_error(self.websocket)
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, queue_size: int = SEND_QUEUE_SIZE,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.drop_oldest,
+                 backplane: Backplane = None):
+        self.queue_size = queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.backplane = backplane or InProcessBackplane()
+        self.active_connections: Dict[WebSocket, Connection] = {}
+        self.topics: Dict[str, Set[Connection]] = {}
+        self._started = False
+
+    async def start(self):
+        if not self._started:
+            self._started = True
+            await self.backplane.start(self.deliver)
 
-    async def connect(self, websocket: WebSocket):
+    async def stop(self):
+        if self._started:
+            self._started = False
+            await self.backplane.stop()
+
+    async def connect(self, websocket: WebSocket, framing: Framing = Framing.text, coalesce_window: float = 0):
+        if framing == Framing.msgpack and msgpack is None:
+            raise RuntimeError("msgpack framing requires the msgpack package")
+        await self.start()
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = Connection(websocket, self.queue_size, framing, coalesce_window)
+        connection.writer = asyncio.create_task(connection.write_loop(self.disconnect))
+        self.active_connections[websocket] = connection
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        connection = self.active_connections.pop(websocket, None)
+        if connection is not None:
+            connection.writer.cancel()
+            for topic in connection.topics:
+                self._remove_subscriber(topic, connection)
+
+    def subscribe(self, websocket: WebSocket, topic: str):
+        connection = self.active_connections[websocket]
+        connection.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, websocket: WebSocket, topic: str):
+        connection = self.active_connections.get(websocket)
+        if connection is not None and topic in connection.topics:
+            connection.topics.discard(topic)
+            self._remove_subscriber(topic, connection)
+
+    def _remove_subscriber(self, topic: str, connection: Connection):
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.topics[topic]
+
+    def enqueue(self, connection: Connection, frame: dict):
+        try:
+            connection.queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            connection.dropped += 1
+        if self.slow_consumer_policy == SlowConsumerPolicy.drop_oldest:
+            connection.queue.get_nowait()
+            connection.queue.put_nowait(frame)
+        else:
+            self.disconnect(connection.websocket)
+            asyncio.create_task(connection.websocket.close(code=status.WS_1008_POLICY_VIOLATION))
+
+    def fan_out(self, connections: Iterable[Connection], message: str):
+        frames = {}
+        for connection in list(connections):
+            frame = frames.get(connection.framing)
+            if frame is None:
+                frame = frames[connection.framing] = encode_frame(message, connection.framing)
+            self.enqueue(connection, frame)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            self.enqueue(connection, encode_frame(message, connection.framing))
+
+    def deliver(self, topic: Union[str, None], message: str):
+        # backplane에서 받은 메시지를 이 프로세스의 연결에 보냅니다.
+        if topic is None:
+            self.fan_out(self.active_connections.values(), message)
+        else:
+            self.fan_out(self.topics.get(topic, ()), message)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+        await self.start()
+        await self.backplane.publish(None, message)
+
+    async def publish(self, topic: str, message: str):
+        await self.start()
+        await self.backplane.publish(topic, message)
+
 
+manager = ConnectionManager(backplane=backplane_from_env())
 
-manager = ConnectionManager()
+
+@router.on_event("shutdown")
+async def stop_manager():
+    await manager.stop()
 
 
 @router.get("/")
@@ -71,8 +245,9 @@ async def get():
 
 
 @router.websocket("/ws/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: int):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, client_id: int, framing: Framing = Framing.text,
+                             coalesce_ms: int = Query(default=0, ge=0, le=MAX_COALESCE_MS)):
+    await manager.connect(websocket, framing, coalesce_ms / 1000)
     try:
         while True:
             data = await websocket.receive_text()
@@ -80,4 +255,19 @@ async def websocket_endpoint(websocket: WebSocket, client_id: int):
             await manager.broadcast(f"Client #{client_id} says: {data}")
     except WebSocketDisconnect:
         manager.disconnect(websocket)
-        await manager.broadcast(f"Client #{client_id} left the chat")
\ No newline at end of file
+        await manager.broadcast(f"Client #{client_id} left the chat")
+
+
+@router.websocket("/ws/rooms/{room}/{client_id}")
+async def room_websocket_endpoint(websocket: WebSocket, room: str, client_id: int,
+                                  framing: Framing = Framing.text,
+                                  coalesce_ms: int = Query(default=0, ge=0, le=MAX_COALESCE_MS)):
+    await manager.connect(websocket, framing, coalesce_ms / 1000)
+    manager.subscribe(websocket, room)
+    try:
+        while True:
+            data = await websocket.receive_text()
+            await manager.publish(room, f"Client #{client_id} says: {data}")
+    except WebSocketDisconnect:
+        manager.disconnect(websocket)
+        await manager.publish(room, f"Client #{client_id} left the room")
\ No newline at end of file
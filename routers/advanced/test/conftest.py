@@ -0,0 +1,15 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# peewee 예제는 import할 때 DB 파일과 테이블을 만들므로, 테스트 모듈을 불러오기 전에 임시 DB를 가리키게 합니다.
+DATABASE_DIR = tempfile.mkdtemp(prefix="peewee-test-")
+os.environ.setdefault("DATABASE_NAME", os.path.join(DATABASE_DIR, "test.db"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def remove_test_database():
+    yield
+    shutil.rmtree(DATABASE_DIR, ignore_errors=True)
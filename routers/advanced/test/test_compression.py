@@ -0,0 +1,134 @@
+import gzip
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from routers.advanced.endpoint.compression import (
+    CompressionMiddleware,
+    PrecompressedStaticFiles,
+    negotiate_encoding,
+    precompress_directory,
+    ranked_encodings,
+)
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+
+@app.get("/large")
+async def large():
+    return {"items": ["compress me"] * 200}
+
+
+@app.get("/tagged")
+async def tagged(request: Request):
+    if request.headers.get("if-none-match", "").removeprefix("W/") == '"v1"':
+        return Response(status_code=304, headers={"ETag": '"v1"'})
+    return JSONResponse({"items": ["compress me"] * 200}, headers={"ETag": '"v1"'})
+
+
+@app.get("/small")
+async def small():
+    return {"items": []}
+
+
+@app.get("/stream")
+async def stream():
+    async def lines():
+        for i in range(50):
+            yield f"line {i}\n"
+
+    return StreamingResponse(lines(), media_type="text/plain")
+
+
+@app.get("/binary")
+async def binary():
+    return PlainTextResponse(b"\x00" * 1000, media_type="application/octet-stream")
+
+
+client = TestClient(app)
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("*") is not None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0.5, br;q=1", available={"br": ".br", "gzip": ".gz"}) == "br"
+    assert ranked_encodings("gzip, deflate, br", available={"br": ".br", "gzip": ".gz"}) == ["br", "gzip"]
+    assert ranked_encodings("br;q=0.5, gzip", available={"br": ".br", "gzip": ".gz"}) == ["gzip", "br"]
+
+
+def test_large_json_is_compressed():
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json()["items"][0] == "compress me"
+
+
+def test_compressed_response_gets_weak_etag():
+    response = client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert client.get("/tagged", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"v1"'
+
+    revalidated = client.get("/tagged", headers={"Accept-Encoding": "gzip", "If-None-Match": 'W/"v1"'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == 'W/"v1"'
+    assert revalidated.headers["vary"] == "Accept-Encoding"
+    plain = client.get("/tagged", headers={"Accept-Encoding": "identity", "If-None-Match": '"v1"'})
+    assert plain.headers["etag"] == '"v1"'
+
+
+def test_small_and_binary_bodies_are_not_compressed():
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/binary", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_streaming_response_is_compressed_per_chunk():
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "".join(f"line {i}\n" for i in range(50))
+
+
+def test_static_files_serve_precompressed_sibling(tmp_path):
+    css = "body { color: black; }\n" * 100
+    (tmp_path / "styles.css").write_text(css)
+    assert str(tmp_path / "styles.css.gz") in precompress_directory(str(tmp_path))
+
+    static_app = FastAPI()
+    static_app.add_middleware(CompressionMiddleware)
+    static_app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)))
+    static_client = TestClient(static_app)
+
+    response = static_client.get("/static/styles.css", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/css")
+    assert int(response.headers["content-length"]) == os.path.getsize(tmp_path / "styles.css.gz")
+    assert response.text == css
+
+    plain = static_client.get("/static/styles.css", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.text == css
+    assert gzip.decompress((tmp_path / "styles.css.gz").read_bytes()).decode() == css
+
+
+def test_static_files_fall_back_to_existing_sibling(tmp_path):
+    js = "console.log('hi');\n" * 200
+    (tmp_path / "app.js").write_text(js)
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(js.encode()))
+
+    static_app = FastAPI()
+    static_app.add_middleware(CompressionMiddleware)
+    static_app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)))
+    static_client = TestClient(static_app)
+
+    response = static_client.get("/static/app.js", headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) == os.path.getsize(tmp_path / "app.js.gz")
+    assert response.text == js
@@ -0,0 +1,31 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.tutorial.endpoint import response
+
+app = FastAPI()
+app.include_router(response.router)
+client = TestClient(app)
+
+
+def test_exclude_unset():
+    result = client.post("/response/users/", json={"name": "foo", "password": "bar"})
+    assert result.status_code == 200
+    assert result.headers["content-type"] == "application/json"
+    assert result.json() == {"name": "foo", "password": "bar"}
+
+
+def test_exclude_defaults():
+    assert client.get("/response/user/", params={"user": "default"}).json() == {"name": "default"}
+    assert client.get("/response/user/", params={"user": "admin"}).json() == {
+        "name": "admin", "email": "admin@admin.com", "age": 30
+    }
+
+
+def test_include_and_exclude():
+    assert client.get("/response/include_user/", params={"user": "admin"}).json() == {
+        "name": "admin", "email": "admin@admin.com"
+    }
+    assert client.get("/response/exclude_user/", params={"user": "admin"}).json() == {
+        "name": "admin", "email": "admin@admin.com", "age": 30, "follow": ["user1"]
+    }
@@ -0,0 +1,175 @@
+import os
+import time
+from email.utils import formatdate
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.advanced.endpoint.compression import CompressionMiddleware, PrecompressedStaticFiles, precompress_directory
+from routers.advanced.endpoint.file_response import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    RangeFileResponse,
+    modified_since,
+    parse_range,
+)
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "data.bin").write_bytes(DATA)
+    (tmp_path / "app.0123abcd.js").write_text("console.log('hi');\n" * 50)
+    return tmp_path
+
+
+@pytest.fixture
+def client(static_dir):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    app.mount("/static", PrecompressedStaticFiles(directory=str(static_dir)))
+
+    @app.api_route("/download", methods=["GET", "HEAD"])
+    async def download():
+        return RangeFileResponse(str(static_dir / "data.bin"), media_type="application/octet-stream")
+
+    return TestClient(app)
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == [(0, 9)]
+    assert parse_range("bytes=-10", 100) == [(90, 99)]
+    assert parse_range("bytes=90-", 100) == [(90, 99)]
+    assert parse_range("bytes=0-9,5-20,21-30", 100) == [(0, 30)]
+    assert parse_range("bytes=200-300", 100) == []
+    assert parse_range("items=0-9", 100) is None
+    assert parse_range("bytes=9-0", 100) is None
+    assert parse_range("bytes=" + ",".join(f"{i * 2}-{i * 2}" for i in range(20)), 100) is None
+
+
+@pytest.mark.parametrize("path", ["/download", "/static/data.bin"])
+def test_full_response_has_validators(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["content-length"] == str(len(DATA))
+
+
+@pytest.mark.parametrize("path", ["/download", "/static/data.bin"])
+def test_conditional_get_returns_304(client, path):
+    first = client.get(path)
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    assert client.get(path, headers={"If-None-Match": f'W/{etag}, "other"'}).status_code == 304
+    assert client.get(path, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(path, headers={"If-None-Match": '"other"'}).status_code == 200
+    assert client.get(path, headers={"If-Modified-Since": formatdate(0, usegmt=True)}).status_code == 200
+
+
+def test_etag_changes_with_content(client, static_dir):
+    etag = client.get("/download").headers["etag"]
+    (static_dir / "data.bin").write_bytes(DATA[::-1])
+    os.utime(static_dir / "data.bin", (1, 1))
+    response = client.get("/download", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.content == DATA[::-1]
+
+
+@pytest.mark.parametrize("path", ["/download", "/static/data.bin"])
+def test_single_range(client, path):
+    response = client.get(path, headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+    assert response.headers["content-length"] == "100"
+    assert response.content == DATA[100:200]
+
+    tail = client.get(path, headers={"Range": "bytes=-16"})
+    assert tail.content == DATA[-16:]
+
+
+def test_multiple_ranges(client):
+    response = client.get("/download", headers={"Range": "bytes=0-9, 500-519"})
+    assert response.status_code == 206
+    content_type = response.headers["content-type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    boundary = content_type.split("boundary=")[1].encode()
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    parts = response.content.split(b"--" + boundary)
+    assert parts[-1] == b"--\r\n"
+    bodies = [part.split(b"\r\n\r\n", 1) for part in parts[1:-1]]
+    assert b"Content-Range: bytes 0-9/10240" in bodies[0][0]
+    assert bodies[0][1] == DATA[0:10] + b"\r\n"
+    assert b"Content-Range: bytes 500-519/10240" in bodies[1][0]
+    assert bodies[1][1] == DATA[500:520] + b"\r\n"
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/download", headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_if_range(client):
+    first = client.get("/download")
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+
+    assert client.get("/download", headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+    assert client.get("/download", headers={"Range": "bytes=0-9", "If-Range": last_modified}).status_code == 206
+    stale = client.get("/download", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == DATA
+
+
+def test_head_sends_headers_only(client):
+    response = client.head("/download", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
+
+
+def test_cache_control(client):
+    assert client.get("/static/data.bin").headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+    assert client.get("/static/app.0123abcd.js").headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+
+def test_static_file_without_sibling_is_not_compressed_per_request(client, static_dir):
+    response = client.get("/static/app.0123abcd.js", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["content-length"] == str(len("console.log('hi');\n" * 50))
+    revalidated = client.get(
+        "/static/app.0123abcd.js",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == response.headers["etag"]
+
+    precompress_directory(str(static_dir))
+    precompressed = client.get("/static/app.0123abcd.js", headers={"Accept-Encoding": "gzip"})
+    assert precompressed.headers["content-encoding"] == "gzip"
+    assert precompressed.headers["etag"].startswith('"')
+    assert precompressed.headers["etag"] != response.headers["etag"]
+    assert precompressed.text == "console.log('hi');\n" * 50
+
+
+def test_modified_since_reads_dates_without_zone_as_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Seoul")
+    time.tzset()
+    try:
+        mtime = 1_000_000_000
+        assert not modified_since(formatdate(mtime).replace("+0000", "-0000"), mtime)
+        assert modified_since(formatdate(mtime - 60).replace("+0000", "-0000"), mtime)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
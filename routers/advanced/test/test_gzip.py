@@ -0,0 +1,56 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from routers.advanced.endpoint.gzip import GzipRequest
+
+client = TestClient(app)
+
+NUMBERS = list(range(1000))
+BODY = json.dumps(NUMBERS).encode()
+
+
+def post(content: bytes, encoding: str):
+    return client.post(
+        "/advanced/gzip/sum",
+        content=content,
+        headers={"Content-Encoding": encoding, "Content-Type": "application/json"},
+    )
+
+
+def test_sum_decompresses_gzip_and_deflate():
+    assert post(gzip.compress(BODY), "gzip").json() == {"sum": sum(NUMBERS)}
+    assert post(zlib.compress(BODY), "deflate").json() == {"sum": sum(NUMBERS)}
+    assert post(zlib.compress(gzip.compress(BODY)), "gzip, deflate").json() == {"sum": sum(NUMBERS)}
+
+
+def test_sum_decompresses_every_gzip_member():
+    half = len(BODY) // 2
+    members = gzip.compress(BODY[:half]) + gzip.compress(BODY[half:])
+    assert post(members, "gzip").json() == {"sum": sum(NUMBERS)}
+    assert post(members + gzip.compress(b"")[:-4], "gzip").status_code == 400
+
+
+def test_decompressed_size_is_limited(monkeypatch):
+    monkeypatch.setattr(GzipRequest, "max_decompressed_size", 1024)
+    bomb = gzip.compress(b"[" + b"0," * 1024 * 1024 + b"0]")
+    response = post(bomb, "gzip")
+    assert response.status_code == 413
+
+
+def test_invalid_compressed_bodies():
+    assert post(gzip.compress(BODY)[:-20], "gzip").status_code == 400
+    assert post(b"not gzip", "gzip").status_code == 400
+    assert post(BODY, "compress").status_code == 415
+
+
+def test_brotli_size_is_limited(monkeypatch):
+    brotli = pytest.importorskip("brotli")
+    assert post(brotli.compress(BODY), "br").json() == {"sum": sum(NUMBERS)}
+    monkeypatch.setattr(GzipRequest, "max_decompressed_size", 1024)
+    bomb = brotli.compress(b"[" + b"0," * 1024 * 1024 + b"0]")
+    assert post(bomb, "br").status_code == 413
@@ -0,0 +1,178 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from routers.advanced.endpoint.job_queue import DurableBackgroundTasks, JobQueue
+
+calls = []
+failures = {"left": 0}
+
+
+def record_call(value):
+    calls.append(value)
+
+
+async def flaky(value):
+    if failures["left"]:
+        failures["left"] -= 1
+        raise RuntimeError("try again")
+    calls.append(value)
+
+
+def read_journal(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.005)
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+    failures["left"] = 0
+
+
+def test_jobs_are_journaled_in_batches_before_running(tmp_path):
+    journal = tmp_path / "jobs.journal"
+
+    async def run():
+        queue = JobQueue(str(journal), workers=2)
+        tasks = DurableBackgroundTasks(queue)
+        for i in range(20):
+            tasks.add_task(record_call, i)
+        await tasks.flush()
+        await wait_for(lambda: len(calls) == 20)
+        await wait_for(lambda: queue.stats.as_dict()["batches"] >= 2 and not queue._records)
+        stats = queue.job_stats()
+        await queue.stop()
+        return stats
+
+    stats = asyncio.run(run())
+    assert sorted(calls) == list(range(20))
+    assert stats["completed"] == 20 and stats["pending"] == 0
+    # enqueue 20개가 한 batch에 fsync 한번으로 기록됩니다.
+    assert stats["batches"] < 20
+    ops = [record["op"] for record in read_journal(journal)]
+    assert ops.count("enqueue") == 20 and ops.count("done") == 20
+
+
+def test_unfinished_jobs_are_recovered(tmp_path):
+    journal = tmp_path / "jobs.journal"
+    journal.write_text(
+        json.dumps({"op": "enqueue", "id": "a", "name": f"{__name__}:record_call", "args": ["a"], "kwargs": {}, "enqueued_at": 0})
+        + "\n"
+        + json.dumps({"op": "enqueue", "id": "b", "name": f"{__name__}:record_call", "args": ["b"], "kwargs": {}, "enqueued_at": 0})
+        + "\n"
+        + json.dumps({"op": "done", "id": "a"})
+        + "\n"
+        + '{"op": "enq'
+    )
+
+    async def run():
+        queue = JobQueue(str(journal))
+        queue.start()
+        await wait_for(lambda: calls == ["b"])
+        await queue.stop()
+        return queue.stats.recovered
+
+    assert asyncio.run(run()) == 1
+    assert [record["op"] for record in read_journal(journal)] == ["enqueue", "done"]
+
+
+def test_failed_jobs_are_retried_with_backoff(tmp_path):
+    failures["left"] = 2
+
+    async def run():
+        queue = JobQueue(str(tmp_path / "jobs.journal"), retry_base=0.01)
+        job_id = await queue.enqueue(flaky, "ok")
+        await wait_for(lambda: calls == ["ok"])
+        await queue.stop()
+        return job_id, queue.stats
+
+    job_id, stats = asyncio.run(run())
+    assert job_id
+    assert stats.retried == 2 and stats.completed == 1 and stats.failed == 0
+
+
+def test_only_module_level_functions_are_accepted(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.journal"))
+    with pytest.raises(ValueError):
+        queue.submit(lambda: None)
+
+
+def make_app(queue):
+    app = FastAPI(on_shutdown=[queue.stop])
+
+    @app.post("/jobs/{value}")
+    async def add_job(value: str, tasks: DurableBackgroundTasks = Depends(lambda: DurableBackgroundTasks(queue))):
+        job = tasks.add_task(record_call, value)
+        await tasks.flush()
+        return {"id": job.result()}
+
+    return app
+
+
+def test_job_is_on_disk_when_response_arrives(tmp_path):
+    journal = tmp_path / "jobs.journal"
+    with TestClient(make_app(JobQueue(str(journal)))) as client:
+        response = client.post("/jobs/a")
+        assert response.status_code == 200
+        assert {"op": "enqueue", "id": response.json()["id"]}.items() <= read_journal(journal)[0].items()
+
+
+def test_journal_failure_is_503(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.journal"))
+
+    def broken_write(lines):
+        raise OSError("disk full")
+
+    queue._write = broken_write
+    with TestClient(make_app(queue)) as client:
+        assert client.post("/jobs/a").status_code == 503
+    assert calls == []
+
+
+def test_add_task_without_await_still_enqueues(tmp_path):
+    journal = tmp_path / "jobs.journal"
+
+    async def run():
+        queue = JobQueue(str(journal))
+        DurableBackgroundTasks(queue).add_task(record_call, "x")
+        await wait_for(lambda: calls == ["x"])
+        await queue.stop()
+        return queue.stats.enqueued
+
+    assert asyncio.run(run()) == 1
+    assert [record["op"] for record in read_journal(journal)] == ["enqueue", "done"]
+
+
+def test_each_process_claims_its_own_journal(tmp_path):
+    journal = tmp_path / "jobs.journal"
+    journal.write_text(
+        json.dumps({"op": "enqueue", "id": "a", "name": f"{__name__}:record_call", "args": ["a"], "kwargs": {}, "enqueued_at": 0})
+        + "\n"
+    )
+
+    async def run():
+        # flock은 열린 파일마다 걸리므로 같은 프로세스의 두 큐도 다른 worker처럼 서로를 막습니다.
+        first, second = JobQueue(str(journal)), JobQueue(str(journal))
+        first.start()
+        second.start()
+        await second.enqueue(record_call, "b")
+        await wait_for(lambda: sorted(calls) == ["a", "b"])
+        paths = first.active_path, second.active_path
+        await first.stop()
+        await second.stop()
+        return paths, first.stats.recovered, second.stats.recovered
+
+    paths, first_recovered, second_recovered = asyncio.run(run())
+    assert paths == (str(journal), f"{journal}.1")
+    assert (first_recovered, second_recovered) == (1, 0)
+    assert [record["id"] for record in read_journal(journal)] == ["a", "a"]
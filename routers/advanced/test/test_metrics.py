@@ -0,0 +1,28 @@
+from fastapi.testclient import TestClient
+
+from main import app
+from routers.advanced.endpoint.metrics import LatencyHistogram
+
+
+def test_metrics_by_route_template():
+    client = TestClient(app)
+    response = client.get("/advanced/request/items/foo")
+    assert "x-process-time" in response.headers
+    client.get("/advanced/request/items/bar")
+    client.get("/subapi/sub/")
+    client.get("/not-found")
+
+    metrics = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/advanced/request/items/{item_id}",status="200"} ' in metrics
+    assert 'route="/subapi/sub/"' in metrics
+    assert 'route="<unmatched>",status="404"' in metrics
+    assert 'http_request_duration_seconds{method="GET",route="/advanced/request/items/{item_id}",quantile="0.99"}' in metrics
+
+
+def test_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for value in range(1, 10001):
+        histogram.record(value)
+    assert abs(histogram.quantile(0.5) - 5000) / 5000 < 0.07
+    assert abs(histogram.quantile(0.99) - 9900) / 9900 < 0.07
+    assert histogram.max == 10000
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from main import app
+from routers.advanced.endpoint.oauth2 import ALGORITHM, SECRET_KEY, token_cache, user_store
+from routers.advanced.endpoint.bounded_executor import BoundedExecutor
+from routers.advanced.endpoint.password_hasher import password_hasher
+from routers.advanced.endpoint.token_cache import TokenCache
+
+client = TestClient(app)
+
+
+def login(scope: str = "me items"):
+    response = client.post(
+        "/advanced/oauth2/token", data={"username": "johndoe", "password": "secret", "scope": scope}
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_verified_token_is_cached_until_revoked():
+    headers = login()
+    hits = token_cache.hits
+    assert client.get("/advanced/oauth2/users/me/", headers=headers).json()["username"] == "johndoe"
+    assert client.get("/advanced/oauth2/users/me/items/", headers=headers).status_code == 200
+    assert token_cache.hits > hits
+
+    assert client.post("/advanced/oauth2/logout", headers=headers).status_code == 200
+    assert client.get("/advanced/oauth2/users/me/", headers=headers).status_code == 401
+
+
+def test_disabling_user_drops_cached_tokens():
+    # 앞 테스트에서 logout한 토큰과 같은 초에 발급되어도 겹치지 않도록 scope를 다르게 합니다.
+    headers = login(scope="me")
+    assert client.get("/advanced/oauth2/users/me/", headers=headers).status_code == 200
+    try:
+        user_store.update("johndoe", disabled=True)
+        response = client.get("/advanced/oauth2/users/me/", headers=headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Inactive user"
+    finally:
+        user_store.update("johndoe", disabled=False)
+    assert client.get("/advanced/oauth2/users/me/", headers=headers).status_code == 200
+
+
+def test_revoke_user_only_drops_that_users_tokens():
+    cache = TokenCache()
+    expires_at = time.time() + 60
+    cache.set("a1", expires_at, "alice", 1)
+    cache.set("a2", expires_at, "alice", 2)
+    cache.set("b1", expires_at, "bob", 3)
+    cache.revoke_user("alice")
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b1") == 3
+    assert "alice" not in cache._by_user
+
+
+def test_token_without_exp_is_rejected():
+    token = jwt.encode({"sub": "johndoe", "scopes": ["me"]}, SECRET_KEY, algorithm=ALGORITHM)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/advanced/oauth2/users/me/", headers=headers).status_code == 401
+    assert client.post("/advanced/oauth2/logout", headers=headers).status_code == 401
+
+
+def test_revoked_tokens_are_swept_after_exp():
+    cache = TokenCache()
+    now = time.time()
+    for i in range(100):
+        cache.revoke(f"expired-{i}", now - 1)
+    cache.revoke("live", now + 60)
+    assert len(cache._revoked) < 100
+    assert cache.is_revoked("live")
+
+
+def test_cached_token_still_checks_scopes():
+    headers = login(scope="me")
+    assert client.get("/advanced/oauth2/users/me/", headers=headers).status_code == 200
+    response = client.get("/advanced/oauth2/users/me/items/", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Not enough permissions"
+
+
+def test_scope_errors_name_the_required_scopes():
+    headers = login(scope="items")
+    response = client.get("/advanced/oauth2/users/me/items/", headers=headers)
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == 'Bearer scope="items me"'
+
+    response = client.get("/advanced/oauth2/status/", headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_login_verifies_password_in_hasher_pool():
+    completed = password_hasher.executor.stats.completed
+    login()
+    response = client.post("/advanced/oauth2/token", data={"username": "johndoe", "password": "wrong"})
+    assert response.status_code == 400
+    stats = client.get("/advanced/oauth2/password-hasher/stats").json()
+    assert stats["completed"] == completed + 2
+    assert stats["in_flight"] == 0
+
+
+def test_bounded_executor_rejects_when_full():
+    executor = BoundedExecutor(max_workers=1, max_queue=0, retry_after=3)
+
+    async def run_two():
+        return await asyncio.gather(executor.run(time.sleep, 0.05), executor.run(time.sleep, 0), return_exceptions=True)
+
+    first, second = asyncio.run(run_two())
+    assert first is None
+    assert isinstance(second, HTTPException)
+    assert second.status_code == 503
+    assert second.headers["Retry-After"] == "3"
+    assert executor.executor_stats()["rejected"] == 1
+
+
+def test_cancelled_caller_keeps_slot_until_thread_finishes():
+    executor = BoundedExecutor(max_workers=1, max_queue=0, retry_after=1)
+    release = threading.Event()
+
+    async def cancel_then_retry():
+        task = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert executor.executor_stats()["in_flight"] == 1
+        try:
+            await executor.run(time.sleep, 0)
+        except HTTPException as exc:
+            return exc.status_code
+
+    assert asyncio.run(cancel_then_retry()) == 503
+    release.set()
+    deadline = time.time() + 2
+    while executor.executor_stats()["in_flight"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert executor.executor_stats()["in_flight"] == 0
@@ -0,0 +1,296 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+import httpx
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from main import app
+from routers.advanced.endpoint.peewee import crud, database, export
+from routers.advanced.endpoint.peewee.cache import MemoryCacheBackend
+from routers.advanced.endpoint.peewee.database import StatsPooledSqliteDatabase, capture_queries, connection_scope
+from routers.advanced.endpoint.peewee.executor import db_executor
+from routers.advanced.endpoint.peewee.export import EXPORT_BATCH_SIZE
+
+
+def create_user(client):
+    email = f"{uuid.uuid4().hex}@example.com"
+    response = client.post("/advanced/peewee/users/", json={"email": email, "password": "secret"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_pool_reuses_connections():
+    with TestClient(app) as client:
+        user = create_user(client)
+        for _ in range(5):
+            response = client.get(f"/advanced/peewee/users/{user['id']}")
+            assert response.status_code == 200
+        stats = client.get("/advanced/peewee/pool/stats").json()
+        assert stats["checkouts"] >= 6
+        assert stats["hits"] >= 5
+        assert stats["in_use"] == 0
+
+
+def test_pool_evicts_connections_idle_past_timeout(tmp_path):
+    pool = StatsPooledSqliteDatabase(str(tmp_path / "pool.db"), max_connections=2, idle_timeout=0.05)
+    pool.connect()
+    pool.close()
+    pool.connect()
+    pool.close()
+    assert pool.pool_stats()["created"] == 1
+
+    time.sleep(0.1)
+    pool.connect()
+    pool.close()
+    stats = pool.pool_stats()
+    assert stats["evicted"] == 1
+    assert stats["created"] == 2
+    pool.close_all()
+
+
+def test_read_items_with_cursor():
+    with TestClient(app) as client:
+        user = create_user(client)
+        for i in range(3):
+            client.post(f"/advanced/peewee/users/{user['id']}/items/", json={"title": f"item {i}", "description": "cursor"})
+        first = client.get("/advanced/peewee/items/", params={"limit": 2})
+        cursor = first.headers["X-Next-Cursor"]
+        second = client.get("/advanced/peewee/items/", params={"limit": 2, "after": cursor})
+        assert second.status_code == 200
+        first_ids = [item["id"] for item in first.json()]
+        second_ids = [item["id"] for item in second.json()]
+        assert min(second_ids) > max(first_ids)
+
+        response = client.get("/advanced/peewee/items/", params={"after": "not-a-cursor"})
+        assert response.status_code == 400
+
+
+def test_read_users_query_count_is_constant():
+    with TestClient(app) as client:
+        for _ in range(5):
+            user = create_user(client)
+            client.post(f"/advanced/peewee/users/{user['id']}/items/", json={"title": "item", "description": "n+1"})
+        counts = []
+        for limit in (1, 5):
+            with capture_queries() as queries:
+                response = client.get("/advanced/peewee/users/", params={"limit": limit})
+            assert response.status_code == 200
+            assert len(response.json()) == limit
+            counts.append(len(queries))
+        assert counts[0] == counts[1] == 2
+
+
+def test_create_users_bulk():
+    with TestClient(app) as client:
+        existing = create_user(client)
+        email = f"{uuid.uuid4().hex}@example.com"
+        payload = [
+            {"email": email, "password": "secret"},
+            {"email": email, "password": "secret"},
+            {"email": existing["email"], "password": "secret"},
+            {"email": "missing-password@example.com"},
+        ]
+        response = client.post("/advanced/peewee/users/bulk", json=payload)
+        assert response.status_code == 200
+        assert [result["status"] for result in response.json()] == ["created", "duplicate", "duplicate", "invalid"]
+        user_id = response.json()[0]["id"]
+        assert client.get(f"/advanced/peewee/users/{user_id}").json()["email"] == email
+
+
+def test_create_users_bulk_conflict_returns_409(monkeypatch):
+    monkeypatch.setattr(crud, "BULK_CHUNK_SIZE", 2)
+    with TestClient(app) as client:
+        existing = create_user(client)
+        emails = [f"{uuid.uuid4().hex}@example.com" for _ in range(3)]
+        # 두번째 묶음을 미리 거른 뒤 다른 요청이 같은 email을 넣은 경우처럼, 그 묶음의 중복 확인만 아무것도 찾지 못하게 합니다.
+        real = crud.existing_emails
+        lookups = [real, lambda emails: set()]
+        monkeypatch.setattr(crud, "existing_emails", lambda emails: (lookups.pop(0) if lookups else real)(emails))
+        payload = [{"email": email, "password": "secret"} for email in emails[:2]]
+        payload += [{"email": emails[2], "password": "secret"}, {"email": existing["email"], "password": "secret"}]
+        response = client.post("/advanced/peewee/users/bulk", json=payload)
+        assert response.status_code == 409
+        rows = response.json()["detail"]
+        assert [row["status"] for row in rows] == ["created", "created", "rolled_back", "duplicate"]
+        # 먼저 커밋된 묶음의 id는 응답에 있고, 충돌한 묶음은 롤백됩니다.
+        with connection_scope():
+            assert crud.get_user_by_email(email=emails[0]).id == rows[0]["id"]
+            assert crud.get_user_by_email(email=emails[2]) is None
+
+
+def test_create_items_bulk_ndjson():
+    with TestClient(app) as client:
+        user = create_user(client)
+        body = "\n".join(f'{{"title": "bulk {i}", "description": "ndjson"}}' for i in range(3))
+        response = client.post(
+            f"/advanced/peewee/users/{user['id']}/items/bulk",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        results = response.json()
+        assert [result["status"] for result in results] == ["created"] * 3
+        items = client.get(f"/advanced/peewee/users/{user['id']}").json()["items"]
+        assert [item["id"] for item in items] == [result["id"] for result in results]
+
+
+def asgi_client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_db_executor_rejects_when_saturated():
+    gate = threading.Event()
+
+    async def run():
+        # worker와 대기열을 실제 작업으로 모두 채운 뒤 요청합니다.
+        blockers = [
+            asyncio.ensure_future(db_executor.run(gate.wait))
+            for _ in range(db_executor.max_workers + db_executor.max_queue)
+        ]
+        await asyncio.sleep(0)
+        try:
+            async with asgi_client() as client:
+                return await client.get("/advanced/peewee/users/")
+        finally:
+            gate.set()
+            await asyncio.gather(*blockers)
+
+    rejected = db_executor.stats.rejected
+    response = asyncio.run(run())
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(db_executor.retry_after)
+    assert db_executor.stats.rejected == rejected + 1
+    assert database.db.pool_stats()["in_use"] == 0
+
+
+def test_concurrent_requests_beyond_worker_count():
+    async def run():
+        async with asgi_client() as client:
+            return await asyncio.gather(
+                *(client.get("/advanced/peewee/users/", params={"limit": 5}) for _ in range(db_executor.max_workers * 4))
+            )
+
+    responses = asyncio.run(run())
+    assert [response.status_code for response in responses] == [200] * (db_executor.max_workers * 4)
+    assert database.db.pool_stats()["in_use"] == 0
+
+
+def test_slow_users_waits_without_holding_db_worker(monkeypatch):
+    from routers.advanced.endpoint.peewee import main
+
+    monkeypatch.setattr(main, "sleep_time", 1.3)
+
+    async def run():
+        async with asgi_client() as client:
+            request = asyncio.ensure_future(client.get("/advanced/peewee/slowusers/", params={"limit": 5}))
+            await asyncio.sleep(0.1)
+            waiting = db_executor.executor_stats()["in_flight"], database.db.pool_stats()["in_use"]
+            return waiting, await request
+
+    waiting, response = asyncio.run(run())
+    assert waiting == (0, 0)
+    assert response.status_code == 200
+
+
+def test_read_user_is_cached_until_item_created():
+    with TestClient(app) as client:
+        user = create_user(client)
+        client.get(f"/advanced/peewee/users/{user['id']}")
+        with capture_queries() as queries:
+            response = client.get(f"/advanced/peewee/users/{user['id']}")
+        assert response.status_code == 200
+        assert queries == []
+
+        client.post(f"/advanced/peewee/users/{user['id']}/items/", json={"title": "cached", "description": "cache"})
+        response = client.get(f"/advanced/peewee/users/{user['id']}")
+        assert [item["title"] for item in response.json()["items"]] == ["cached"]
+
+
+def test_loader_started_before_write_does_not_cache_stale_user(monkeypatch):
+    with TestClient(app) as client:
+        user = create_user(client)
+    key = crud.user_key(user["id"])
+    crud.invalidate_cache(key)
+    prefetch = crud.peewee.prefetch
+
+    def prefetch_then_write(*args, **kwargs):
+        # 로더가 행을 읽은 직후, 캐시에 넣기 전에 다른 요청이 item을 추가한 상황입니다.
+        rows = list(prefetch(*args, **kwargs))
+        crud.create_user_item(crud.schemas.ItemCreate(title="late", description="late"), user["id"])
+        return rows
+
+    monkeypatch.setattr(crud.peewee, "prefetch", prefetch_then_write)
+    with connection_scope():
+        assert crud.get_user(user["id"]).items == []
+    monkeypatch.setattr(crud.peewee, "prefetch", prefetch)
+    assert crud.user_cache.get(key) is None
+    with connection_scope():
+        assert [item.title for item in crud.get_user(user["id"]).items] == ["late"]
+
+
+def test_cache_generation_table_is_bounded(monkeypatch):
+    monkeypatch.setattr(crud, "CACHE_GENERATIONS_MAX", 2)
+    generation = crud.cache_generation("user:-1")
+    for i in range(5):
+        crud.invalidate_cache(f"user:-{i + 2}")
+    assert len(crud._generations) <= 2
+    crud.cache_if_current("user:-1", generation, "stale")
+    assert crud.user_cache.get("user:-1") is None
+
+
+def test_memory_cache_caps_bytes():
+    cache = MemoryCacheBackend(max_bytes=200, ttl=60)
+    for i in range(10):
+        cache.set(f"key{i}", "x" * 50)
+    stats = cache.cache_stats()
+    assert stats["bytes"] <= 200
+    assert stats["evictions"] > 0
+    assert cache.get("key0") is None
+    assert cache.get("key9") == "x" * 50
+
+
+def test_export_items_streams_ndjson_and_csv():
+    with TestClient(app) as client:
+        user = create_user(client)
+        payload = [{"title": f"export {i}", "description": "export"} for i in range(EXPORT_BATCH_SIZE + 1)]
+        client.post(f"/advanced/peewee/users/{user['id']}/items/bulk", json=payload)
+
+        response = client.get("/advanced/peewee/items/export")
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len([row for row in rows if row["owner_id"] == user["id"]]) == len(payload)
+
+        response = client.get("/advanced/peewee/items/export", params={"format": "csv"})
+        lines = response.text.splitlines()
+        assert lines[0] == "id,title,description,owner_id"
+        assert len(lines) == len(rows) + 1
+        assert client.get("/advanced/peewee/pool/stats").json()["in_use"] == 0
+
+
+def test_export_ends_with_error_record_when_batch_fails(monkeypatch):
+    with TestClient(app) as client:
+        user = create_user(client)
+        payload = [{"title": f"export {i}", "description": "export"} for i in range(EXPORT_BATCH_SIZE + 1)]
+        client.post(f"/advanced/peewee/users/{user['id']}/items/bulk", json=payload)
+
+        first_batch = export.next_batch
+
+        def failing_next_batch(query, last_id):
+            if last_id is not None:
+                raise HTTPException(status_code=503, detail="Database is busy")
+            return first_batch(query, last_id)
+
+        monkeypatch.setattr(export, "next_batch", failing_next_batch)
+        response = client.get("/advanced/peewee/items/export")
+        assert response.status_code == 200
+        lines = response.text.splitlines()
+        assert len(lines) == EXPORT_BATCH_SIZE + 1
+        assert json.loads(lines[-1]) == {"error": "export aborted", "detail": "Database is busy"}
+
+        response = client.get("/advanced/peewee/items/export", params={"format": "csv"})
+        assert response.text.splitlines()[-1] == "# export aborted: Database is busy"
+        assert client.get("/advanced/peewee/pool/stats").json()["in_use"] == 0
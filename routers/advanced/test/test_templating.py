@@ -0,0 +1,81 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from routers.advanced.endpoint import template
+from routers.advanced.endpoint.templating import ProductionTemplates, buffered
+
+app = FastAPI()
+app.include_router(template.router)
+app.mount("/static", StaticFiles(directory="./routers/advanced/static"), name="static")
+
+
+def test_item_page_uses_cached_url_for():
+    with TestClient(app) as client:
+        first = client.get("/templates/items/foo")
+        hits = template.templates.url_hits
+        second = client.get("/templates/items/bar")
+    assert first.status_code == 200
+    assert "Item ID: foo" in first.text
+    assert 'href="http://testserver/static/styles.css"' in second.text
+    assert template.templates.url_hits > hits
+    assert first.template.name == "item.html"
+
+
+def test_large_page_is_streamed():
+    with TestClient(app) as client:
+        response = client.get("/templates/items", params={"count": 2000})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert "content-length" not in response.headers
+    assert response.text.count("<tr>") == 2000
+    assert '<a href="http://testserver/templates/items/1999">1999</a>' in response.text
+    assert "<td>2998.50</td>" in response.text
+    assert response.template.name == "items.html"
+    assert template.templates.template_stats()["routes"] >= 2
+
+
+def test_precompile_writes_bytecode_cache(tmp_path):
+    templates = ProductionTemplates(directory="./routers/advanced/templates", cache_dir=str(tmp_path))
+    assert set(templates.precompile()) >= {"item.html", "items.html"}
+    assert len(os.listdir(tmp_path)) >= 2
+    assert templates.env.auto_reload is False
+
+    # 새 프로세스처럼 새 환경을 만들어도 bytecode cache에서 읽으므로 다시 컴파일하지 않습니다.
+    fresh = ProductionTemplates(directory="./routers/advanced/templates", cache_dir=str(tmp_path))
+    fresh.env.compile = None
+    page = fresh.get_template("item.html").render(id="1", url_for=lambda name, **path_params: "")
+    assert "Item ID: 1" in page
+
+
+def test_url_cache_is_thread_safe():
+    # 캐시를 작게 잡아 여러 스레드가 같은 키를 읽는 동안 계속 밀려나게 합니다.
+    templates = ProductionTemplates(directory="./routers/advanced/templates", url_cache_size=4)
+    scope = {"type": "http", "method": "GET", "path": "/", "root_path": "", "query_string": b"",
+             "scheme": "http", "server": ("testserver", 80), "headers": [], "router": app.router, "app": app}
+
+    def render(worker):
+        request = Request(scope)
+        return [templates.cached_url_for(request, "read_item", id=str((worker + i) % 8)) for i in range(2000)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(render, range(8)))
+    assert results[0][0] == "http://testserver/templates/items/0"
+    stats = templates.template_stats()
+    assert stats["url_hits"] + stats["url_misses"] == 8 * 2000
+    assert stats["url_cache_size"] <= 4
+
+
+def test_reload_mode_keeps_default_url_for():
+    templates = ProductionTemplates(directory="./routers/advanced/templates", reload=True)
+    assert templates.env.auto_reload is True
+    assert templates.env.bytecode_cache is None
+
+
+def test_buffered_joins_small_chunks():
+    chunks = list(buffered(iter(["a"] * 10), size=4))
+    assert chunks == [b"aaaa", b"aaaa", b"aa"]
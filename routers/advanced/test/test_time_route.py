@@ -0,0 +1,67 @@
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from main import app
+from routers.advanced.endpoint.time_route import TimedRoute, timing_buffer
+
+error_router = APIRouter(route_class=TimedRoute)
+
+
+@error_router.get("/missing")
+async def missing():
+    raise HTTPException(status_code=404, detail="Not found")
+
+
+@error_router.get("/broken")
+async def broken():
+    raise RuntimeError("boom")
+
+
+@error_router.get("/numbers/{number}")
+async def number(number: int):
+    return {"number": number}
+
+
+error_app = FastAPI()
+error_app.include_router(error_router)
+
+
+def test_timed_route_records_phases():
+    with TestClient(app) as client:
+        timing_buffer.drain()
+        response = client.get("/advanced/timed/timed")
+        assert response.status_code == 200
+        assert "X-Response-Time" in response.headers
+        records = timing_buffer.drain()
+    assert len(records) == 1
+    record = records[0]
+    assert record.route == "/advanced/timed/timed"
+    assert record.status_code == 200
+    assert abs(record.duration - (record.dependencies + record.handler + record.serialization)) < 1e-6
+
+
+def test_timed_route_sampling():
+    sample_rate, timing_buffer.sample_rate = timing_buffer.sample_rate, 0
+    try:
+        with TestClient(app) as client:
+            timing_buffer.drain()
+            response = client.get("/advanced/timed/timed")
+            assert "X-Response-Time" in response.headers
+            assert timing_buffer.drain() == []
+    finally:
+        timing_buffer.sample_rate = sample_rate
+
+
+def test_timed_route_records_failed_requests():
+    client = TestClient(error_app, raise_server_exceptions=False)
+    timing_buffer.drain()
+    assert client.get("/missing").status_code == 404
+    assert client.get("/numbers/abc").status_code == 422
+    assert client.get("/broken").status_code == 500
+    records = timing_buffer.drain()
+    assert [(record.route, record.status_code) for record in records] == [
+        ("/missing", 404),
+        ("/numbers/{number}", 422),
+        ("/broken", 500),
+    ]
+    assert all(record.duration >= 0 for record in records)
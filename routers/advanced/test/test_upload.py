@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from routers.advanced.endpoint import upload
+from routers.advanced.endpoint.upload import PART_SIZE_MIN, UploadSessionCreate, UploadSessionStore, stream_multipart
+from routers.tutorial.endpoint import form
+
+CONTENT = os.urandom(300 * 1024)
+
+
+def make_client(tmp_path, max_size=1024 * 1024):
+    app = FastAPI()
+    app.include_router(form.router)
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        fields, files = await stream_multipart(request, upload_dir=str(tmp_path), max_size=max_size)
+        return {"fields": fields, "files": [file.__dict__ for file in files]}
+
+    return TestClient(app)
+
+
+def test_stream_multipart_writes_files_and_hashes(tmp_path):
+    client = make_client(tmp_path)
+    response = client.post(
+        "/upload", data={"token": "abc"}, files={"file": ("data.bin", CONTENT, "application/octet-stream")}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["fields"] == {"token": "abc"}
+    uploaded = body["files"][0]
+    assert uploaded["filename"] == "data.bin"
+    assert uploaded["size"] == len(CONTENT)
+    assert uploaded["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    with open(uploaded["path"], "rb") as file:
+        assert file.read() == CONTENT
+
+
+def test_stream_multipart_rejects_large_uploads_and_cleans_up(tmp_path):
+    client = make_client(tmp_path, max_size=100 * 1024)
+    response = client.post("/upload", files={"file": ("data.bin", CONTENT, "application/octet-stream")})
+    assert response.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+def test_stream_multipart_requires_multipart(tmp_path):
+    client = make_client(tmp_path)
+    assert client.post("/upload", json={"file": "x"}).status_code == 415
+
+
+def test_form_file_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    client = make_client(tmp_path)
+    response = client.post(
+        "/form/files/",
+        data={"token": "abc"},
+        files={"file": ("a.bin", CONTENT), "fileb": ("b.txt", b"b", "text/plain")},
+    )
+    assert response.json() == {"file_size": len(CONTENT), "token": "abc", "fileb_content_type": "text/plain"}
+    response = client.post("/form/stream-upload/", files={"file": ("a.bin", CONTENT)})
+    assert response.json()["files"][0]["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    # 받은 파일은 응답 뒤에 임시 디렉터리째 지워집니다.
+    assert os.listdir(tmp_path / "uploads") == []
+    response = client.post("/form/readfile/", files={"file": ("a.bin", CONTENT)})
+    assert response.json() == {"file": "a.bin", "sha256": hashlib.sha256(CONTENT).hexdigest()}
+
+
+def test_resumable_upload_in_parallel_parts(tmp_path, monkeypatch):
+    store = UploadSessionStore(root=str(tmp_path / "sessions"), upload_dir=str(tmp_path))
+    monkeypatch.setattr(form, "upload_sessions", store)
+    client = make_client(tmp_path)
+    part_size = 64 * 1024
+    session = client.post("/form/uploads/", json={"filename": "big.bin", "size": len(CONTENT), "part_size": part_size}).json()
+    upload_id = session["upload_id"]
+    assert session["part_count"] == 5
+
+    parts = [CONTENT[i:i + part_size] for i in range(0, len(CONTENT), part_size)]
+    # 순서와 관계없이, 일부는 나중에 이어서 올립니다.
+    for number in (3, 0, 4):
+        response = client.put(f"/form/uploads/{upload_id}/parts/{number}", content=parts[number],
+                              headers={"X-Part-SHA256": hashlib.sha256(parts[number]).hexdigest()})
+        assert response.status_code == 200
+    assert client.get(f"/form/uploads/{upload_id}").json()["received_parts"] == [0, 3, 4]
+    assert client.post(f"/form/uploads/{upload_id}/complete").json()["detail"] == {"missing_parts": [1, 2]}
+
+    bad = client.put(f"/form/uploads/{upload_id}/parts/1", content=parts[1], headers={"X-Part-SHA256": "0" * 64})
+    assert bad.status_code == 400
+    short = client.put(f"/form/uploads/{upload_id}/parts/2", content=parts[2][:-1])
+    assert short.status_code == 400
+    for number in (1, 2):
+        assert client.put(f"/form/uploads/{upload_id}/parts/{number}", content=parts[number]).status_code == 200
+
+    response = client.post(f"/form/uploads/{upload_id}/complete")
+    assert response.status_code == 200
+    expected = hashlib.sha256("".join(hashlib.sha256(part).hexdigest() for part in parts).encode()).hexdigest()
+    assert response.json()["checksum"] == f"{expected}-5"
+    with open(tmp_path / f"{upload_id}-big.bin", "rb") as file:
+        assert file.read() == CONTENT
+    assert client.get(f"/form/uploads/{upload_id}").json()["completed"] is True
+    assert client.post(f"/form/uploads/{upload_id}/complete").status_code == 409
+    assert client.put(f"/form/uploads/{upload_id}/parts/0", content=parts[0]).status_code == 409
+
+
+def test_parts_are_written_concurrently(tmp_path):
+    store = UploadSessionStore(root=str(tmp_path / "sessions"), upload_dir=str(tmp_path))
+    part_size = 64 * 1024
+    parts = [CONTENT[i:i + part_size] for i in range(0, len(CONTENT), part_size)]
+
+    app = FastAPI()
+
+    @app.put("/parts/{upload_id}/{part}")
+    async def put_part(upload_id: str, part: int, request: Request):
+        session = await store.get(upload_id)
+        return await store.write_part(session, part, request)
+
+    async def run():
+        session = await store.create(UploadSessionCreate(filename="big.bin", size=len(CONTENT), part_size=part_size))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = await asyncio.gather(
+                *(client.put(f"/parts/{session.id}/{number}", content=part) for number, part in enumerate(parts))
+            )
+        assert all(response.status_code == 200 for response in responses)
+        return await store.complete(session)
+
+    path, _ = asyncio.run(run())
+    with open(path, "rb") as file:
+        assert file.read() == CONTENT
+
+
+class BlockedRequest:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.release = asyncio.Event()
+
+    async def stream(self):
+        await self.release.wait()
+        yield self.data
+
+
+def test_in_flight_parts_lock_out_duplicates_and_complete(tmp_path):
+    store = UploadSessionStore(root=str(tmp_path / "sessions"), upload_dir=str(tmp_path))
+
+    async def run():
+        session = await store.create(UploadSessionCreate(filename="a.bin", size=PART_SIZE_MIN, part_size=PART_SIZE_MIN))
+        request = BlockedRequest(CONTENT[:PART_SIZE_MIN])
+        first = asyncio.ensure_future(store.write_part(session, 0, request))
+        await asyncio.sleep(0)
+        errors = []
+        for attempt in (store.write_part(session, 0, BlockedRequest(b"")), store.complete(session)):
+            try:
+                await attempt
+            except HTTPException as exc:
+                errors.append(exc.status_code)
+        request.release.set()
+        await first
+        await store.complete(session)
+        return errors
+
+    assert asyncio.run(run()) == [409, 409]
+
+
+def test_expired_sessions_are_swept(tmp_path):
+    store = UploadSessionStore(root=str(tmp_path / "sessions"), upload_dir=str(tmp_path), ttl=60)
+
+    async def run():
+        old = await store.create(UploadSessionCreate(filename="old.bin", size=10, part_size=PART_SIZE_MIN))
+        os.makedirs(tmp_path / "sessions" / "orphan")
+        removed = await store.sweep(now=time.time() + 120)
+        with pytest.raises(HTTPException):
+            await store.get(old.id)
+        return removed
+
+    assert len(asyncio.run(run())) == 2
+    assert os.listdir(tmp_path / "sessions") == []
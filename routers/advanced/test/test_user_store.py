@@ -0,0 +1,116 @@
+import asyncio
+import subprocess
+import sys
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from main import app
+from routers.advanced.endpoint import oauth2
+from routers.advanced.endpoint.password_hasher import password_hasher
+from routers.advanced.endpoint.peewee import models
+from routers.advanced.endpoint.peewee.database import connection_scope
+from routers.advanced.endpoint.user_store import DictUserStore, PeeweeUserStore, UserRecord
+from routers.tutorial.endpoint import security
+from routers.tutorial.endpoint.security import fake_users_db
+
+
+class CountingStore(DictUserStore):
+    def __init__(self, users, **kwargs):
+        super().__init__(users, **kwargs)
+        self.calls = []
+
+    async def fetch_many(self, usernames):
+        self.calls.append(list(usernames))
+        await asyncio.sleep(0)
+        return await super().fetch_many(usernames)
+
+
+def test_concurrent_lookups_share_one_batch():
+    store = CountingStore(fake_users_db)
+
+    async def lookups():
+        return await asyncio.gather(
+            store.get("johndoe"), store.get("johndoe"), store.get("alice"), store.get("nobody")
+        )
+
+    johndoe, again, alice, nobody = asyncio.run(lookups())
+    assert store.calls == [["johndoe", "alice", "nobody"]]
+    assert johndoe is again
+    assert isinstance(johndoe, UserRecord) and johndoe.hashed_password == "fakehashedsecret"
+    assert alice.disabled is True
+    assert nobody is None
+    assert store.coalesced == 1
+
+    assert asyncio.run(store.get("johndoe")) is johndoe
+    assert store.hits == 1 and len(store.calls) == 1
+
+
+def test_failed_fetch_is_not_cached():
+    class BrokenStore(DictUserStore):
+        async def fetch_many(self, usernames):
+            raise RuntimeError("database is down")
+
+    store = BrokenStore(fake_users_db)
+
+    async def lookup():
+        try:
+            await store.get("johndoe")
+        except RuntimeError:
+            return "failed"
+
+    assert asyncio.run(lookup()) == "failed"
+    assert store.store_stats()["cached"] == 0
+
+
+def create_peewee_user(hashed_password):
+    email = f"{uuid.uuid4().hex}@example.com"
+    with connection_scope():
+        models.User.create(email=email, hashed_password=hashed_password)
+    return email
+
+
+def test_peewee_store_looks_up_users_by_email():
+    email = create_peewee_user(password_hasher.context.hash("secret"))
+    record = asyncio.run(PeeweeUserStore().get(email))
+    assert record.username == email
+    assert record.disabled is False
+
+
+def test_login_through_peewee_store(monkeypatch):
+    monkeypatch.setattr(oauth2, "user_store", PeeweeUserStore())
+    email = create_peewee_user(password_hasher.context.hash("secret"))
+    client = TestClient(app)
+    response = client.post("/advanced/oauth2/token", data={"username": email, "password": "secret"})
+    assert response.status_code == 200
+    # peewee 예제의 /users/로 만든 사용자는 bcrypt 해시가 없으므로 500이 아니라 로그인 실패입니다.
+    with TestClient(app) as client:
+        fake = f"{uuid.uuid4().hex}@example.com"
+        assert client.post("/advanced/peewee/users/", json={"email": fake, "password": "secret"}).status_code == 200
+        response = client.post("/advanced/oauth2/token", data={"username": fake, "password": "secret"})
+    assert response.status_code == 400
+
+    monkeypatch.setattr(oauth2, "user_store", DictUserStore(fake_users_db))
+    assert asyncio.run(oauth2.authenticate_user("johndoe", "secret")) is False
+
+
+def test_security_tutorial_uses_store():
+    tutorial_app = FastAPI()
+    tutorial_app.include_router(security.router)
+    client = TestClient(tutorial_app)
+    response = client.post("/security/token", data={"username": "johndoe", "password": "secret"})
+    assert response.status_code == 200
+    me = client.get("/security/users/me", headers={"Authorization": "Bearer johndoe"})
+    assert me.json()["username"] == "johndoe"
+
+
+def test_auth_modules_do_not_import_peewee():
+    # 테스트 프로세스는 이미 peewee 예제를 불러왔으므로 새 인터프리터에서 확인합니다.
+    code = (
+        "import sys\n"
+        "from routers.tutorial.endpoint import jwt_security, security\n"
+        "from routers.advanced.endpoint import oauth2\n"
+        "assert not [name for name in sys.modules if 'peewee' in name], sorted(sys.modules)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -1,6 +1,16 @@
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from fastapi import WebSocketDisconnect, status
 from fastapi.testclient import TestClient
 
 from main import app
+from routers.advanced.endpoint.backplane import UnixSocketBackplane
+from routers.advanced.endpoint.websocket import ConnectionManager, Framing, SlowConsumerPolicy
 
 
 def test_websocket():
@@ -9,3 +19,168 @@ def test_websocket():
         ws.send_text("asdf")
         data = ws.receive_text()
         assert data == "You wrote: asdf"
+
+
+class SlowWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+        self.release = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send(self, message):
+        await self.release.wait()
+        self.sent.append(message.get("bytes") or message["text"])
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+def test_broadcast_drops_oldest_for_slow_consumer():
+    async def scenario():
+        manager = ConnectionManager(queue_size=2)
+        slow = SlowWebSocket()
+        await manager.connect(slow)
+        await asyncio.sleep(0)
+        for i in range(5):
+            await manager.broadcast(str(i))
+        connection = manager.active_connections[slow]
+        slow.release.set()
+        await asyncio.sleep(0.01)
+        manager.disconnect(slow)
+        return slow.sent, connection.dropped
+
+    sent, dropped = asyncio.run(scenario())
+    assert sent == ["3", "4"]
+    assert dropped == 3
+
+
+def test_broadcast_disconnects_slow_consumer():
+    async def scenario():
+        manager = ConnectionManager(queue_size=1, slow_consumer_policy=SlowConsumerPolicy.disconnect)
+        slow = SlowWebSocket()
+        await manager.connect(slow)
+        await asyncio.sleep(0)
+        for i in range(3):
+            await manager.broadcast(f"line {i}\nsecond line")
+        await asyncio.sleep(0)
+        return manager.active_connections, slow.closed
+
+    active_connections, closed = asyncio.run(scenario())
+    assert active_connections == {}
+    assert closed == status.WS_1008_POLICY_VIOLATION
+
+
+def test_room_messages_only_reach_subscribers():
+    test_client = TestClient(app)
+    with test_client.websocket_connect("/advanced/ws/rooms/a/1") as first, \
+            test_client.websocket_connect("/advanced/ws/rooms/a/2") as second, \
+            test_client.websocket_connect("/advanced/ws/rooms/b/3") as other:
+        first.send_text("hello")
+        assert first.receive_text() == "Client #1 says: hello"
+        assert second.receive_text() == "Client #1 says: hello"
+        other.send_text("ping")
+        assert other.receive_text() == "Client #3 says: ping"
+
+
+def test_unix_socket_backplane_reaches_other_process(tmp_path):
+    async def scenario():
+        received = []
+        first = UnixSocketBackplane(str(tmp_path), name="first")
+        second = UnixSocketBackplane(str(tmp_path), name="second")
+        await first.start(lambda topic, message: received.append(("first", topic, message)))
+        await second.start(lambda topic, message: received.append(("second", topic, message)))
+        await first.publish("room", "a")
+        await first.publish(None, "b")
+        await asyncio.sleep(0.05)
+        await first.stop()
+        await second.stop()
+        return received, first.sent_batches
+
+    received, sent_batches = asyncio.run(scenario())
+    assert received == [
+        ("first", "room", "a"),
+        ("first", None, "b"),
+        ("second", "room", "a"),
+        ("second", None, "b"),
+    ]
+    assert sent_batches == 1
+
+
+def test_unix_socket_backplane_splits_batches_by_encoded_size(tmp_path):
+    batch_max_bytes = 4096
+    # 한 글자가 \uXXXX 6 byte로 인코딩되므로 문자 수로 세면 datagram이 한도를 크게 넘습니다.
+    messages = [f"{i} " + "안녕하세요" * 60 for i in range(40)]
+
+    async def scenario():
+        received = []
+        sizes = []
+        first = UnixSocketBackplane(str(tmp_path), name="first", batch_max_bytes=batch_max_bytes)
+        second = UnixSocketBackplane(str(tmp_path), name="second")
+        await first.start(lambda topic, message: None)
+        await second.start(lambda topic, message: received.append(message))
+        sendto = first._sender.sendto
+        first._sender = SimpleNamespace(
+            sendto=lambda data, peer: (sizes.append(len(data)), sendto(data, peer)), close=first._sender.close
+        )
+        for message in messages:
+            await first.publish("room", message)
+            # 받는 쪽 소켓 대기열(max_dgram_qlen)이 넘치지 않도록 수신 루프에 차례를 줍니다.
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.05)
+        await first.stop()
+        await second.stop()
+        return received, sizes, first.dropped_batches
+
+    received, sizes, dropped = asyncio.run(scenario())
+    assert received == messages
+    assert len(sizes) > 1
+    assert max(sizes) <= batch_max_bytes
+    assert dropped == 0
+
+
+def test_coalesced_frames():
+    msgpack = pytest.importorskip("msgpack")
+
+    async def scenario(framing):
+        manager = ConnectionManager()
+        websocket = SlowWebSocket()
+        websocket.release.set()
+        await manager.connect(websocket, framing=framing, coalesce_window=0.01)
+        for i in range(3):
+            await manager.broadcast(f"line {i}\nsecond line")
+        await asyncio.sleep(0.05)
+        connection = manager.active_connections[websocket]
+        manager.disconnect(websocket)
+        return websocket.sent, connection.frames_sent
+
+    sent, frames_sent = asyncio.run(scenario(Framing.text))
+    assert json.loads(sent[0]) == [f"line {i}\nsecond line" for i in range(3)]
+    assert frames_sent == 1
+
+    sent, frames_sent = asyncio.run(scenario(Framing.msgpack))
+    assert list(msgpack.Unpacker(io.BytesIO(sent[0]))) == [f"line {i}\nsecond line" for i in range(3)]
+    assert frames_sent == 1
+
+
+def test_msgpack_framing_over_websocket():
+    msgpack = pytest.importorskip("msgpack")
+    test_client = TestClient(app)
+    with test_client.websocket_connect("/advanced/ws/7?framing=msgpack") as ws:
+        ws.send_text("hi")
+        assert msgpack.unpackb(ws.receive_bytes()) == "You wrote: hi"
+
+
+def test_coalesce_ms_is_bounded():
+    test_client = TestClient(app)
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with test_client.websocket_connect("/advanced/ws/8?coalesce_ms=60000") as ws:
+            ws.receive_text()
+    assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
+
+    with test_client.websocket_connect("/advanced/ws/9?coalesce_ms=10") as ws:
+        ws.send_text("hi")
+        # 개인 메시지와 broadcast가 coalesce 구간 안에 들어와 한 frame으로 옵니다.
+        assert json.loads(ws.receive_text()) == ["You wrote: hi", "Client #9 says: hi"]
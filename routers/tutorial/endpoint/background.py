@@ -1,15 +1,35 @@
-from fastapi import BackgroundTasks, APIRouter
+from fastapi import APIRouter, Depends
+
+from routers.advanced.endpoint.job_queue import DurableBackgroundTasks, durable_background_tasks, job_queue
 
 router = APIRouter()
 
 
+@router.on_event("startup")
+async def start_job_queue():
+    job_queue.start()
+
+
+@router.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+
+
 def write_notification(email: str, message=""):
-    with open("log.txt", mode="w") as email_file:
-        content = f"notification for {email}: {message}"
+    # 여러 작업이 같은 파일에 쓰므로 덮어쓰지 않고 한 줄씩 이어 씁니다.
+    with open("log.txt", mode="a") as email_file:
+        content = f"notification for {email}: {message}\n"
         email_file.write(content)
 
 
 @router.post("/send-notification/{email}")
-async def send_notification(email: str, background_tasks: BackgroundTasks):
+async def send_notification(email: str, background_tasks: DurableBackgroundTasks = Depends(durable_background_tasks)):
     background_tasks.add_task(write_notification, email, message="some notification")
+    # journal에 기록된 뒤에 응답하므로, 응답을 받은 작업은 서버가 재시작해도 실행됩니다.
+    await background_tasks.flush()
     return {"message": "Notification sent in the background"}
+
+
+@router.get("/jobs/stats")
+async def read_job_stats():
+    return job_queue.job_stats()
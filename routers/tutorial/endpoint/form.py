@@ -1,4 +1,19 @@
-from fastapi import APIRouter, Form, File, UploadFile
+import hashlib
+import os
+
+from typing import Union
+
+from fastapi import APIRouter, Depends, Form, File, Header, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from routers.advanced.endpoint.upload import (
+    UPLOAD_READ_CHUNK,
+    UploadSessionCreate,
+    stream_multipart,
+    temporary_upload_dir,
+    upload_openapi,
+    upload_sessions,
+)
 
 router = APIRouter(
     prefix='/form'
@@ -9,9 +24,11 @@ async def login(username: str = Form(), password: str = Form()):
     return {"username": username}
 
 @router.post("/files/")
-async def create_file(file: bytes = File(), fileb: UploadFile = File(), token: str = Form()):
+async def create_file(file: UploadFile = File(), fileb: UploadFile = File(), token: str = Form()):
+    # bytes로 받으면 파일 전체가 메모리에 올라오므로, 임시 파일의 끝 위치로 크기만 구합니다.
+    file_size = await run_in_threadpool(file.file.seek, 0, os.SEEK_END)
     return {
-        "file_size": len(file),
+        "file_size": file_size,
         "token": token,
         "fileb_content_type": fileb.content_type
     }
@@ -25,5 +42,61 @@ async def create_upload_file(file: UploadFile):
 
 @router.post("/readfile/")
 async def read_file(file: UploadFile):
-    contexts = file.file.read()
-    return {"file": file.filename}
+    # 한번에 read()하면 파일 전체가 메모리에 올라오므로 조각씩 읽으며 sha256만 계산합니다.
+    hasher = hashlib.sha256()
+    while chunk := await file.read(UPLOAD_READ_CHUNK):
+        hasher.update(chunk)
+    return {"file": file.filename, "sha256": hasher.hexdigest()}
+
+
+@router.post("/stream-upload/", openapi_extra=upload_openapi("file"))
+async def stream_upload(request: Request, upload_dir: str = Depends(temporary_upload_dir)):
+    """
+    multipart 본문을 받는 대로 디스크에 쓰면서 sha256을 계산합니다. 파일 전체를 메모리에 올리지 않습니다.
+    받은 파일은 요청마다 만든 임시 디렉터리에 두었다가 응답을 보낸 뒤 지웁니다.
+    """
+    fields, files = await stream_multipart(request, upload_dir=upload_dir)
+    return {
+        "fields": fields,
+        "files": [{"field": f.field_name, "filename": f.filename, "size": f.size, "sha256": f.sha256} for f in files],
+    }
+
+
+@router.post("/uploads/")
+async def create_upload_session(upload: UploadSessionCreate):
+    """
+    이어 올리기 세션을 만듭니다. 이후 part 번호별로 PUT하고(병렬 가능) complete를 호출합니다.
+    """
+    session = await upload_sessions.create(upload)
+    return {"upload_id": session.id, "part_size": session.part_size, "part_count": session.part_count}
+
+
+@router.get("/uploads/{upload_id}")
+async def read_upload_session(upload_id: str):
+    session = await upload_sessions.get(upload_id)
+    received = await upload_sessions.received_parts(session)
+    return {
+        "upload_id": session.id,
+        "filename": session.filename,
+        "size": session.size,
+        "part_count": session.part_count,
+        "received_parts": sorted(received),
+        "completed": session.completed,
+    }
+
+
+@router.put("/uploads/{upload_id}/parts/{part}", openapi_extra={
+    "requestBody": {"content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}}
+})
+async def upload_part(upload_id: str, part: int, request: Request,
+                      x_part_sha256: Union[str, None] = Header(default=None)):
+    session = await upload_sessions.get(upload_id)
+    size, sha256 = await upload_sessions.write_part(session, part, request, x_part_sha256)
+    return {"part": part, "size": size, "sha256": sha256}
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload_session(upload_id: str):
+    session = await upload_sessions.get(upload_id)
+    path, checksum = await upload_sessions.complete(session)
+    return {"filename": session.filename, "size": session.size, "checksum": checksum}
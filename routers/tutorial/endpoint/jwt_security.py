@@ -2,9 +2,12 @@ from datetime import datetime, timedelta
 from fastapi import Depends, APIRouter, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
 
+from routers.advanced.endpoint.password_hasher import password_hasher
+from routers.advanced.endpoint.token_cache import TokenCache
+from routers.advanced.endpoint.user_store import user_store_from_env
+
 
 SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
 ALGORITHM = "HS256"
@@ -42,7 +45,12 @@ class UserInDB(User):
     hashed_password: str
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = password_hasher.context
+
+token_cache = TokenCache()
+
+user_store = user_store_from_env(fake_users_db)
+user_store.subscribe(token_cache.revoke_user)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="jwt_security/token")
 
@@ -59,17 +67,15 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
-def get_user(db, username: str):
-    if username in db:
-        user_dict = db[username]
-        return UserInDB(**user_dict)
-
-
-def authenticate_user(fake_db, username: str, password: str):
-    user = get_user(fake_db, username)
+async def authenticate_user(username: str, password: str):
+    user = await user_store.get(username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    try:
+        verified = await password_hasher.verify(password, user.hashed_password)
+    except ValueError:  # passlib이 알아보지 못하는 해시
+        return False
+    if not verified:
         return False
     return user
 
@@ -91,17 +97,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if token_cache.is_revoked(token):
+        raise credentials_exception
+    user = token_cache.get(token)
+    if user is not None:
+        return user
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or payload.get("exp") is None:
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = get_user(fake_users_db, username=token_data.username)
+    user = await user_store.get(token_data.username)
     if user is None:
         raise credentials_exception
+    token_cache.set(token, payload["exp"], user.username, user)
     return user
 
 
@@ -113,7 +125,7 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(fake_users_db, form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -127,6 +139,18 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    if payload.get("exp") is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    token_cache.revoke(token, payload["exp"])
+    return {"message": "Token revoked"}
+
+
 @router.get("/users/me/", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
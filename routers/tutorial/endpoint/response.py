@@ -3,8 +3,11 @@ from typing import Union
 from fastapi import APIRouter
 from pydantic import BaseModel, EmailStr
 
+from routers.advanced.endpoint.fast_response import FastResponseRoute
+
 router = APIRouter(
-    prefix='/response'
+    prefix='/response',
+    route_class=FastResponseRoute,
 )
 
 